@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Dict, Optional, TYPE_CHECKING
 
 
 from pymodaq.control_modules.move_utility_classes import (DAQ_Move_base, comon_parameters_fun, main,
@@ -7,9 +7,14 @@ from pymodaq.control_modules.move_utility_classes import (DAQ_Move_base, comon_p
 from pymodaq.utils.daq_utils import ThreadCommand
 from pymodaq.utils.parameter import Parameter
 
-from pymodaq_plugins_arduino.hardware.arduino_telemetrix import Arduino
+from pymodaq_plugins_arduino.hardware.calibration import CalibrationLUT, calibration_from_config
+from pymodaq_plugins_arduino.hardware.com_ports import PluginParams
+from pymodaq_plugins_arduino.hardware.controller_registry import acquire_controller, controller_registry
 from pymodaq_plugins_arduino.utils import Config
 
+if TYPE_CHECKING:
+    from pymodaq_plugins_arduino.hardware.arduino_telemetrix import Arduino
+
 config = Config()
 
 
@@ -19,6 +24,9 @@ class DAQ_Move_LED(DAQ_Move_base):
     This object inherits all functionalities to communicate with PyMoDAQ’s DAQ_Move module through inheritance via
     DAQ_Move_base. It makes a bridge between the DAQ_Move module and the Python wrapper of a particular instrument.
 
+    The actuator values are levels (0-255) converted to PWM values by the calibration of each channel (gamma
+    curve or measured table of the [LED.calibration] section of the config file, identity by default).
+
     Attributes:
     -----------
     controller: object
@@ -35,14 +43,17 @@ class DAQ_Move_LED(DAQ_Move_base):
     _epsilon = 0.01
     data_actuator_type = DataActuatorType['DataActuator']
 
-    params = [
+    params = PluginParams([
                  {'title': 'Ports:', 'name': 'com_port', 'type': 'list',
-                  'value': config('com_port'), 'limits': Arduino.COM_PORTS}
+                  'value': config('com_port'), 'limits': [config('com_port')]}
 
-                ] + comon_parameters_fun(is_multiaxes, axis_names=_axis_names, epsilon=_epsilon)
+                ] + comon_parameters_fun(is_multiaxes, axis_names=_axis_names, epsilon=_epsilon))
 
     def ini_attributes(self):
-        self.controller: Optional[Arduino] = None
+        self.controller: Optional['Arduino'] = None
+        self.calibrations: Dict[int, CalibrationLUT] = {
+            pin: calibration_from_config(config('LED', 'calibration'), axis) for axis, pin in self._axis_names.items()}
+        self._levels: Dict[int, float] = {}  # last level written on each pin
 
     def get_actuator_value(self):
         """Get the current value from the hardware with scaling conversion.
@@ -52,15 +63,20 @@ class DAQ_Move_LED(DAQ_Move_base):
         float: The position obtained after scaling conversion.
         """
 
-        pos = DataActuator(data=self.controller.get_output_pin_value(self.axis_value))  # when writing your own plugin replace this line
+        calibration = self.calibrations[self.axis_value]
+        pwm = self.controller.get_output_pin_value(self.axis_value)
+        level = self._levels.get(self.axis_value)
+        if level is None or calibration.to_pwm(level) != pwm:  # the pin has been written by someone else
+            level = calibration.to_level(pwm)
+        pos = DataActuator(data=level)
         pos = self.get_position_with_scaling(pos)
         return pos
 
     def close(self):
         """Terminate the communication protocol"""
         if self.is_master:
-            self.controller.set_pins_output_to(0)
-            self.controller.shutdown()
+            self.controller.set_pins_output_to(0, pins=self._axis_names.values())
+            controller_registry.release(self.controller)
 
     def commit_settings(self, param: Parameter):
         """Apply the consequences of a change of value in the detector settings
@@ -92,9 +108,7 @@ class DAQ_Move_LED(DAQ_Move_base):
             old_controller=controller,
             new_controller=None)
         if self.is_master:
-            self.controller = Arduino(
-                com_port=self.settings['com_port']
-                                              )
+            self.controller = acquire_controller(self.settings['com_port'])
             self.set_pins()
 
         info = "Whatever info you want to log"
@@ -113,12 +127,7 @@ class DAQ_Move_LED(DAQ_Move_base):
         value: (float) value of the absolute target positioning
         """
 
-        value = self.check_bound(value)  #if user checked bounds, the defined bounds are applied here
-        self.target_value = value
-        value = self.set_position_with_scaling(value)  # apply scaling if the user specified one
-
-        self.controller.analog_write_and_memorize(self.axis_value,
-                                                  int(value.value()))
+        self.write_levels(self.target_levels(value))
 
     def move_rel(self, value: DataActuator):
         """ Move the actuator to the relative target actuator value defined by value
@@ -132,12 +141,50 @@ class DAQ_Move_LED(DAQ_Move_base):
         value = self.set_position_relative_with_scaling(value)
 
         # value is set in percent
-        self.controller.analog_write_and_memorize(self.axis_value,
-                                                  int(self.target_value.value()))
+        self.write_levels({self.axis_value: self.target_value.value()})
 
     def move_home(self):
         """Call the reference method of the controller"""
-        self.controller.analog_write_and_memorize(self.axis_value, 0)
+        self.write_levels({self.axis_value: 0})
+
+    def move_axes_abs(self, values: Dict[str, float]):
+        """ Set several channels at once, without bounds nor scaling
+
+        All the channels are written in a single message so that no intermediate color is displayed. This is a
+        custom command executed in the plugin thread, sent from the DAQ_Move module with:
+        mod.command_hardware.emit(ThreadCommand('move_axes_abs', [{'Red': 255, 'Green': 0, 'Blue': 0}]))
+        The move_done signal then gives the new value of the current axis.
+
+        Parameters
+        ----------
+        values: dict
+            The value of each channel, keyed by axis name (Red, Green, Blue)
+        """
+        self.write_levels({self.axis_names[axis]: value for axis, value in values.items()})
+        if self.axis_name in values:
+            self.target_value = self.get_position_with_scaling(DataActuator(data=float(values[self.axis_name])))
+        self.move_done()
+
+    def target_levels(self, value: DataActuator) -> Dict[int, float]:
+        """ Apply the bounds and the scaling to an absolute target of the current axis
+
+        Returns
+        -------
+        dict: the level to write on the pin of the axis, keyed by pin number
+        """
+        value = self.check_bound(value)  #if user checked bounds, the defined bounds are applied here
+        self.target_value = value
+        value = self.set_position_with_scaling(value)  # apply scaling if the user specified one
+        return {self.axis_value: value.value()}
+
+    def levels_to_pwm(self, levels: Dict[int, float]) -> Dict[int, int]:
+        """ Convert levels to PWM values through the calibration of each pin, the levels are memorized"""
+        self._levels.update(levels)
+        return {pin: self.calibrations[pin].to_pwm(level) for pin, level in levels.items()}
+
+    def write_levels(self, levels: Dict[int, float]):
+        """ Write the levels of several pins in a single message, through the calibration of each pin"""
+        self.controller.write_pins(self.levels_to_pwm(levels))
 
     def stop_motion(self):
       """Stop the actuator and emits move_done signal"""
@@ -1,7 +1,9 @@
+from typing import Dict
+
 from pymodaq.control_modules.move_utility_classes import main
 
 from pymodaq_plugins_arduino.daq_move_plugins.daq_move_LED import DAQ_Move_LED
-from pymodaq_plugins_arduino.hardware.led_lcd import LED_LCD
+from pymodaq_plugins_arduino.hardware.controller_registry import acquire_controller
 from pymodaq_plugins_arduino.utils import Config
 
 config = Config()
@@ -40,16 +42,19 @@ class DAQ_Move_LEDwithLCD(DAQ_Move_LED):
             old_controller=controller,
             new_controller=None)
         if self.is_master:
-            self.controller = LED_LCD(
-                com_port=self.settings['com_port']
-                                              )
-            self.controller.ini_lcd()
+            self.controller = acquire_controller(self.settings['com_port'], 'LED_LCD')
+            if not self.controller.is_lcd_init:
+                self.controller.ini_lcd()
             self.set_pins()
 
         info = "Whatever info you want to log"
         initialized = True
         return info, initialized
 
+    def write_levels(self, levels: Dict[int, float]):
+        """ Write the levels of several pins in a single message, the LCD displays the levels, not the PWM values"""
+        self.controller.write_pins(self.levels_to_pwm(levels), levels=levels)
+
 
 if __name__ == '__main__':
     main(__file__)
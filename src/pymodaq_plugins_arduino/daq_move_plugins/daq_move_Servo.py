@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
 
 from pymodaq.control_modules.move_utility_classes import (DAQ_Move_base, comon_parameters_fun, main,
@@ -7,9 +7,13 @@ from pymodaq.control_modules.move_utility_classes import (DAQ_Move_base, comon_p
 from pymodaq.utils.daq_utils import ThreadCommand
 from pymodaq.utils.parameter import Parameter
 
-from pymodaq_plugins_arduino.hardware.arduino_telemetrix import Arduino
+from pymodaq_plugins_arduino.hardware.com_ports import PluginParams
+from pymodaq_plugins_arduino.hardware.controller_registry import acquire_controller, controller_registry
 from pymodaq_plugins_arduino.utils import Config
 
+if TYPE_CHECKING:
+    from pymodaq_plugins_arduino.hardware.arduino_telemetrix import Arduino
+
 config = Config()
 
 
@@ -32,13 +36,13 @@ class DAQ_Move_Servo(DAQ_Move_base):
     _epsilon = 1
     data_actuator_type = DataActuatorType['DataActuator']
 
-    params = [
+    params = PluginParams([
                  {'title': 'Ports:', 'name': 'com_port', 'type': 'list',
-                  'value': config('com_port'), 'limits': Arduino.COM_PORTS}
-             ] + comon_parameters_fun(is_multiaxes, axis_names=_axis_names, epsilon=_epsilon)
+                  'value': config('com_port'), 'limits': [config('com_port')]}
+             ] + comon_parameters_fun(is_multiaxes, axis_names=_axis_names, epsilon=_epsilon))
 
     def ini_attributes(self):
-        self.controller: Optional[Arduino] = None
+        self.controller: Optional['Arduino'] = None
 
     def get_actuator_value(self):
         """Get the current value from the hardware with scaling conversion.
@@ -55,8 +59,8 @@ class DAQ_Move_Servo(DAQ_Move_base):
     def close(self):
         """Terminate the communication protocol"""
         if self.is_master:
-            self.controller.set_pins_output_to(0)
-            self.controller.shutdown()
+            self.controller.set_pins_output_to(0, pins=self._axis_names.values())
+            controller_registry.release(self.controller)
 
     def commit_settings(self, param: Parameter):
         """Apply the consequences of a change of value in the detector settings
@@ -88,9 +92,7 @@ class DAQ_Move_Servo(DAQ_Move_base):
             old_controller=controller,
             new_controller=None)
         if self.is_master:
-            self.controller = Arduino(
-                com_port=self.settings['com_port']
-                                              )
+            self.controller = acquire_controller(self.settings['com_port'])
         self.controller.set_pin_mode_servo(config('servo', 'pin'))
 
         info = "Whatever info you want to log"
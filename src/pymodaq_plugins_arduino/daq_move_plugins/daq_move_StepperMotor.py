@@ -1,15 +1,35 @@
-from typing import Union, List, Dict, Optional
+from concurrent.futures import Future, TimeoutError
+from typing import Union, List, Dict, Optional, TYPE_CHECKING
 from pymodaq.control_modules.move_utility_classes import (
     DAQ_Move_base, comon_parameters_fun, main, DataActuatorType, DataActuator
 )
 from pymodaq_utils.utils import ThreadCommand  # Object used to send info back to the main thread
 from pymodaq_gui.parameter import Parameter
-from pymodaq_plugins_arduino.hardware.arduino_telemetrix import Arduino
+from pymodaq_plugins_arduino.hardware.com_ports import PluginParams
+from pymodaq_plugins_arduino.hardware.controller_registry import acquire_controller, controller_registry
 from pymodaq_plugins_arduino.utils import Config
 
+if TYPE_CHECKING:
+    from pymodaq_plugins_arduino.hardware.arduino_telemetrix import Arduino
+
 config = Config()
 
 
+def get_stepper_axes() -> Dict[str, Dict[str, int]]:
+    """Get the pins of the stepper axes from the config file.
+
+    Each [stepper.<axis>] table (with pul_pin, dir_pin and ena_pin keys) defines an axis. The legacy single
+    [stepper.pins] table is used, as the 'Stepper' axis, only if no such table is defined.
+    """
+    axes = {name: pins for name, pins in config('stepper').items() if isinstance(pins, dict) and name != 'pins'}
+    return axes if len(axes) > 0 else {'Stepper': config('stepper', 'pins')}
+
+
+def position_value(position: Union[float, DataActuator]) -> float:
+    """The numeric value of a position, given as a float or as a DataActuator (for instance coerced by check_bound)."""
+    return position.value() if isinstance(position, DataActuator) else float(position)
+
+
 class DAQ_Move_StepperMotor(DAQ_Move_base):
     """Plugin to control stepper motor using Arduino controller and PyMoDAQ.
 
@@ -17,7 +37,8 @@ class DAQ_Move_StepperMotor(DAQ_Move_base):
     DAQ_Move_base. It makes a bridge between the DAQ_Move module and the Python wrapper of a particular instrument.
 
     Use the arduino_telemetrix wrapper to communicate with the Arduino Board.
-    It may work with up to 4 axes depending on the configuration.
+    It may work with up to 4 axes depending on the configuration, each axis being defined by a [stepper.<axis>]
+    table of the config file with its own pins.
     It does not consider the daisy chain option: only one controller.
     Tested with Arduino Uno and one motor NEMA17 (1 axis).
     PyMoDAQ version during the test was PyMoDAQ==5.0.5.
@@ -31,23 +52,30 @@ class DAQ_Move_StepperMotor(DAQ_Move_base):
         hardware library.
     """
     is_multiaxes = True
-    _axis_names: Union[List[str], Dict[str, int]] = {'Stepper': config('stepper')}
+    _axis_names: Union[List[str], Dict[str, int]] = {name: ind for ind, name in enumerate(get_stepper_axes())}
     _controller_units: Union[str, List[str]] = ''  # steps
     _epsilon: Union[float, List[float]] = 1
     data_actuator_type = DataActuatorType.float
 
-    params = [
+    params = PluginParams([
         {
             'title': 'Ports:',
             'name': 'com_port',
             'type': 'list',
             'value': config('com_port'),
-            'limits': Arduino.COM_PORTS,
+            'limits': [config('com_port')],
         }
-    ] + comon_parameters_fun(is_multiaxes, axis_names=_axis_names, epsilon=_epsilon)
+    ] + comon_parameters_fun(is_multiaxes, axis_names=_axis_names, epsilon=_epsilon))
 
     def ini_attributes(self):
-        self.controller: Optional[Arduino] = None
+        self.controller: Optional['Arduino'] = None
+        self._move: Optional[Future] = None
+        self._motors: Dict[str, int] = {}  # motor id of each axis
+
+    @property
+    def motor(self) -> int:
+        """The id of the motor of the current axis."""
+        return self._motors[self.axis_name]
 
     def get_actuator_value(self) -> float:
         """Get the current value from the hardware with scaling conversion.
@@ -57,17 +85,18 @@ class DAQ_Move_StepperMotor(DAQ_Move_base):
         float
             The position obtained after scaling conversion.
         """
-        pos = self.controller.get_stepper_position()
+        pos = self.controller.estimate_stepper_position(self.motor)  # from the motion profile, no serial round trip
         pos = self.get_position_with_scaling(pos)
         return pos
 
     def user_condition_to_reach_target(self) -> bool:
         """Will be triggered for each end of move; abs, rel, or homing."""
-        return self._move_done
+        return self._move is None or self._move.done()
 
     def close(self):
         """Terminate the communication protocol."""
-        self.controller.shutdown()
+        if self.is_master:
+            controller_registry.release(self.controller)
 
     def commit_settings(self, param: Parameter):
         """Apply the consequences of a change of value in the detector settings.
@@ -96,20 +125,22 @@ class DAQ_Move_StepperMotor(DAQ_Move_base):
         self.ini_stage_init(slave_controller=controller)  # Useful when controller is slave
 
         if self.is_master:  # Needed when controller is master
-            self.controller = Arduino(
-                com_port=self.settings['com_port']
-            )
-            self.controller.initialize_stepper_motor(
-                config('stepper', 'pins', 'pul_pin'),
-                config('stepper', 'pins', 'dir_pin'),
-                config('stepper', 'pins', 'ena_pin'),
-            )  # Pulse, direction, enable pins
+            self.controller = acquire_controller(self.settings['com_port'])
+        for axis, pins in get_stepper_axes().items():  # motors already initialized on a shared board are reused
+            self._motors[axis] = self.controller.initialize_stepper_motor(
+                pins['pul_pin'],
+                pins['dir_pin'],
+                pins['ena_pin'],
+                config('stepper', 'position_rate'),
+                config('stepper', 'enable_policy'),
+                config('stepper', 'idle_timeout'),
+            )  # Pulse, direction, enable pins, position polling rate, enable pin policy
 
         info = "Stepper motor connected with config file"
         initialized = True  # TODO: Replace with actual initialization check
         return info, initialized
 
-    def move_abs(self, value: DataActuator):
+    def move_abs(self, value: float):
         """Move the actuator to the absolute target defined by value.
 
         Parameters
@@ -117,13 +148,13 @@ class DAQ_Move_StepperMotor(DAQ_Move_base):
         value: float
             Value of the absolute target positioning.
         """
-        value = self.check_bound(value)  # Apply bounds if user checked them
+        value = position_value(self.check_bound(value))  # Apply bounds if user checked them
         self.target_value = value
         value = self.set_position_with_scaling(value)  # Apply scaling if specified
-        self._move_done = self.controller.move_stepper_to_position(value)
-        self.emit_status(ThreadCommand('Update_Status', ['absolute move done']))
+        self._move = self.controller.start_stepper_move(value, motor=self.motor)  # the polling reports the progress
+        self.emit_status(ThreadCommand('Update_Status', ['absolute move started']))
 
-    def move_rel(self, value: DataActuator):
+    def move_rel(self, value: float):
         """Move the actuator to the relative target actuator value defined by value.
 
         Parameters
@@ -131,20 +162,45 @@ class DAQ_Move_StepperMotor(DAQ_Move_base):
         value: float
             Value of the relative target positioning.
         """
-        value = self.check_bound(self.current_position + value) - self.current_position
-        self.target_value = value + self.current_position
-        value = self.set_position_relative_with_scaling(value)
-        self._move_done = self.controller.move_stepper_to_position(self.target_value)
-        self.emit_status(ThreadCommand('Update_Status', ['relative move done']))
+        target = position_value(self.check_bound(self.current_value + value))
+        self.target_value = target
+        target = self.set_position_with_scaling(target)  # the board moves to absolute positions
+        self._move = self.controller.start_stepper_move(target, motor=self.motor)
+        self.emit_status(ThreadCommand('Update_Status', ['relative move started']))
 
     def move_home(self):
         """Call the reference method of the controller."""
-        self.controller.move_stepper_to_position(0)  # Move to home position (0)
+        self._move = self.controller.start_stepper_move(0, motor=self.motor)  # Move to home position (0)
         self.emit_status(ThreadCommand('Update_Status', ['homing']))
 
+    def move_axes_abs(self, positions: Dict[str, float]):
+        """Move several axes together to their absolute target, without bounds nor scaling.
+
+        This is a custom command executed in the plugin thread, sent from the DAQ_Move module with:
+        mod.command_hardware.emit(ThreadCommand('move_axes_abs', [{'X': 100, 'Y': 200}]))
+        The move is polled like the other ones, move_done being emitted when the last axis has reached its target.
+
+        Parameters
+        ----------
+        positions: dict
+            The target of each axis (steps), keyed by axis name.
+        """
+        self._move = self.controller.start_coordinated_move(
+            {self._motors[axis]: position for axis, position in positions.items()})
+        if self.axis_name in positions:
+            self.target_value = position_value(self.get_position_with_scaling(float(positions[self.axis_name])))
+        else:
+            self.target_value = position_value(self.current_value)
+        self.emit_status(ThreadCommand('Update_Status', ['coordinated move started']))
+        self.poll_moving()
+
     def stop_motion(self):
         """Stop the actuator and emit move_done signal."""
-        pass
+        try:
+            self.controller.stop_stepper(self.motor).result(timeout=self.settings['timeout'])
+        except TimeoutError:
+            self.emit_status(ThreadCommand('Update_Status', ['stepper motor stop not confirmed']))
+        self.move_done()
 
 
 if __name__ == '__main__':
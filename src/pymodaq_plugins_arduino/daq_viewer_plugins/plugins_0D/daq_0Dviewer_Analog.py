@@ -1,13 +1,19 @@
 import numpy as np
 from pymodaq.utils.data import DataFromPlugins, DataToExport
 from pymodaq.control_modules.viewer_utility_classes import DAQ_Viewer_base, comon_parameters, main
+from pymodaq.utils.daq_utils import ThreadCommand
 from pymodaq.utils.parameter import Parameter
 
-from typing import Optional
+from time import perf_counter
+from typing import List, Optional, Tuple, TYPE_CHECKING
 
-from pymodaq_plugins_arduino.hardware.arduino_telemetrix import Arduino
+from pymodaq_plugins_arduino.hardware.com_ports import PluginParams
+from pymodaq_plugins_arduino.hardware.controller_registry import acquire_controller, controller_registry
 from pymodaq_plugins_arduino.utils import Config
 
+if TYPE_CHECKING:
+    from pymodaq_plugins_arduino.hardware.arduino_telemetrix import Arduino
+
 
 config = Config()
 class DAQ_0DViewer_Analog(DAQ_Viewer_base):
@@ -31,9 +37,17 @@ class DAQ_0DViewer_Analog(DAQ_Viewer_base):
 
    """
     _controller_units=''
-    params = comon_parameters + [{'title': 'Ports:', 'name': 'com_port', 'type': 'list',
-                  'value': config('com_port'), 'limits': Arduino.COM_PORTS},
+    hardware_averaging = True
+    params = PluginParams(comon_parameters + [{'title': 'Ports:', 'name': 'com_port', 'type': 'list',
+                  'value': config('com_port'), 'limits': [config('com_port')]},
         {'title': 'Separated viewers', 'name': 'sep_viewers', 'type': 'bool', 'value': False},
+        {'title': 'Streaming', 'name': 'streaming', 'type': 'bool', 'value': True,
+         'tip': 'Keep the analog reporting enabled and read the last received values at each grab'},
+        {'title': 'Scan interval (ms):', 'name': 'scan_interval', 'type': 'int', 'value': 1,
+         'min': 0, 'max': 255},
+        {'title': 'Fresh samples', 'name': 'fresh_sample', 'type': 'bool', 'value': True,
+         'tip': 'Wait for samples newer than the grab request'},
+        {'title': 'Timeout (ms):', 'name': 'timeout', 'type': 'int', 'value': 100, 'min': 0},
         {'name':'AI0', 'type':'group','children':[
             {'title': 'Activate', 'name': 'ch', 'type': 'led_push', 'value':False, 'label':'On/Off',
              'tip':'click to change status, Green: On, Red: Off'},
@@ -72,10 +86,10 @@ class DAQ_0DViewer_Analog(DAQ_Viewer_base):
              'value': 'Volts'},
         ]}
 
-    ]
+    ])
 
     def ini_attributes(self):
-        self.controller: Optional[Arduino] = None
+        self.controller: Optional['Arduino'] = None
         pass
 
     def commit_settings(self, param: Parameter):
@@ -86,37 +100,33 @@ class DAQ_0DViewer_Analog(DAQ_Viewer_base):
         param: Parameter
             A given parameter (within detector_settings) whose value has been changed by the user
         """
-        if param.name() == "ai0":
-            if param.value():
-                self.controller.set_analog_input(0)
-            else:
-                self.controller.disable_analog_reporting(0)
-        if param.name() == "ai1":
-            if param.value():
-                self.controller.set_analog_input(1)
-            else:
-                self.controller.disable_analog_reporting(1)
-        if param.name() == "ai2":
+        if param.name() == 'ch':
+            channel = int(param.parent().name()[2:3])
             if param.value():
-                self.controller.set_analog_input(2)
+                if self.settings['streaming']:
+                    self.controller.start_analog_streaming(channel, self.settings['scan_interval'], owner=self)
+                else:
+                    self.controller.set_analog_input(channel)
             else:
-                self.controller.disable_analog_reporting(2)
-        if param.name() == "ai3":
+                self.controller.stop_analog_streaming(channel, owner=self)
+        elif param.name() == 'streaming':
             if param.value():
-                self.controller.set_analog_input(3)
+                self.start_streaming()
             else:
-                self.controller.disable_analog_reporting(3)
-        if param.name() == "ai4":
-            if param.value():
-                self.controller.set_analog_input(4)
-            else:
-                self.controller.disable_analog_reporting(4)
-        if param.name() == "ai5":
-            if param.value():
-                self.controller.set_analog_input(5)
-            else:
-                self.controller.disable_analog_reporting(5)
+                self.stop()
+        elif param.name() == 'scan_interval':
+            if self.settings['streaming']:
+                self.controller.set_analog_scan_interval(param.value())
+
+    def get_active_channels(self) -> List[int]:
+        """Get the analog channels activated by the user"""
+        return [int(param.name()[2:3]) for param in self.settings.children()
+                if 'AI' in param.name() and param['ch']]
 
+    def start_streaming(self):
+        """Enable the continuous reporting of all the active channels (nothing is sent for the streamed ones)"""
+        for channel in self.get_active_channels():
+            self.controller.start_analog_streaming(channel, self.settings['scan_interval'], owner=self)
 
     def ini_detector(self, controller=None):
         """Detector communication initialization
@@ -137,7 +147,10 @@ class DAQ_0DViewer_Analog(DAQ_Viewer_base):
         self.ini_detector_init(slave_controller=controller)
 
         if self.is_master:
-            self.controller = Arduino(com_port=self.settings['com_port'])  # instantiate you driver with whatever arguments are needed
+            self.controller = acquire_controller(self.settings['com_port'])
+
+        if self.settings['streaming']:
+            self.start_streaming()
 
         info = "Analog ready"
         initialized = True
@@ -146,7 +159,8 @@ class DAQ_0DViewer_Analog(DAQ_Viewer_base):
     def close(self):
         """Terminate the communication protocol"""
         if self.is_master:
-            self.controller.shutdown()
+            self.stop()
+            controller_registry.release(self.controller)
 
     def grab_data(self, Naverage=1, **kwargs):
         """Start a grab from the detector
@@ -159,34 +173,97 @@ class DAQ_0DViewer_Analog(DAQ_Viewer_base):
         kwargs: dict
             others optionals arguments
         """
-        data_tot=[]
-        channel_available=[]
+        channel_available = self.get_active_channels()
+        Naverage = max(1, int(Naverage))
+        fresh_sample = self.settings['fresh_sample'] or (not self.settings['streaming'] and Naverage > 1)
+        # a single deadline for all the channels, extended by the time needed by the board to scan Naverage samples
+        deadline = (perf_counter() + self.settings['timeout'] / 1000
+                    + Naverage * max(1, self.settings['scan_interval']) / 1000)
+        fresh = True
 
-        for param in self.settings.children():
-            if 'AI' in param.name():
-                if param['ch']:
-                    channel_available.append(int(param.name()[2:3]))
-                    self.controller.set_analog_input(int(param.name()[2:3]))
-                    data_tot.append(np.array([self.controller.analog_pin_values_input[int(param.name()[2:3])]]))
+        indexes = [self.controller.get_analog_buffer(channel).count for channel in channel_available]
+        if self.settings['streaming']:
+            self.start_streaming()  # only needed if channels have been stopped, no serial traffic otherwise
+            if fresh_sample:
+                fresh = self.wait_for_samples(channel_available, indexes, Naverage, deadline)
+        elif Naverage == 1:
+            for channel in channel_available:
+                timeout = max(deadline - perf_counter(), 0.) if fresh_sample else None
+                fresh = self.controller.set_analog_input(channel, timeout) and fresh
+        else:
+            for channel in channel_available:
+                self.controller.start_analog_streaming(channel, self.settings['scan_interval'], owner=self)
+            fresh = self.wait_for_samples(channel_available, indexes, Naverage, deadline)
+            for channel in channel_available:
+                self.controller.stop_analog_streaming(channel, owner=self)
+        if not fresh:
+            self.emit_status(ThreadCommand('Update_Status',
+                                           [f'No fresh analog sample received within {self.settings["timeout"]} ms,'
+                                            f' NaN returned for the missing channels']))
+
+        data_tot = []
+        data_std = []
+        for channel, index in zip(channel_available, indexes):
+            if fresh_sample:
+                mean, std = self.average(channel, Naverage, index)
+            elif Naverage == 1:
+                mean, std = self.controller.analog_pin_values_input[channel], 0.
+            else:
+                mean, std = self.average(channel, Naverage)
+            data_tot.append(np.array([mean]))
+            if Naverage > 1:
+                data_std.append(np.array([std]))
 
         if self.settings.child('sep_viewers').value():
             dat = DataToExport('Analog0D',
-                               data=[DataFromPlugins(name=f'AI{channel_available[ind]}', data=[data],
+                               data=[DataFromPlugins(name=f'AI{channel_available[ind]}',
+                                                     data=[data] if Naverage == 1 else [data, data_std[ind]],
                                                      dim='Data0D',
-                                                     labels=[f'AI{channel_available[ind]} data '])
+                                                     labels=[f'AI{channel_available[ind]} data '] if Naverage == 1
+                                                     else [f'AI{channel_available[ind]} data ',
+                                                           f'AI{channel_available[ind]} std '])
                                                              for ind, data in enumerate(data_tot)])
             self.dte_signal.emit(dat)
         else:
-            self.dte_signal.emit(DataToExport(name='Analog Input',
-                                          data=[DataFromPlugins(name='AI', data=data_tot,
-                                                                dim='Data0D',
-                                                                labels=[f'AI{channel_available[ind]} data '
-                                                                        for ind, data in enumerate(data_tot)])]))
+            dat = DataToExport(name='Analog Input',
+                               data=[DataFromPlugins(name='AI', data=data_tot,
+                                                     dim='Data0D',
+                                                     labels=[f'AI{channel_available[ind]} data '
+                                                             for ind, data in enumerate(data_tot)])])
+            if Naverage > 1:
+                dat.append(DataFromPlugins(name='AI std', data=data_std,
+                                           dim='Data0D',
+                                           labels=[f'AI{channel_available[ind]} std '
+                                                   for ind, data in enumerate(data_std)]))
+            self.dte_signal.emit(dat)
+
+    def wait_for_samples(self, channels: List[int], indexes: List[int], Naverage: int, deadline: float) -> bool:
+        """Wait for Naverage samples newer than indexes on each channel, until the deadline (perf_counter time)"""
+        fresh = True
+        for channel, index in zip(channels, indexes):
+            fresh = self.controller.wait_for_analog_sample(channel, index + Naverage - 1,
+                                                           max(deadline - perf_counter(), 0.)) and fresh
+        return fresh
+
+    def average(self, channel: int, Naverage: int, index: Optional[int] = None) -> Tuple[float, float]:
+        """Get the mean and standard deviation of Naverage samples of a channel
 
+        The samples are the first ones received since the buffer index if given (fresh samples), else the last
+        ones. NaN if there is no such sample.
+        """
+        buffer = self.controller.get_analog_buffer(channel)
+        if index is None:
+            _, values = buffer.read_last(Naverage)
+        else:
+            _, values, _ = buffer.read_since(index)
+            values = values[:Naverage]
+        if len(values) == 0:
+            return np.nan, np.nan
+        return float(np.mean(values)), float(np.std(values))
 
     def stop(self):
         """Stop the current grab hardware wise if necessary"""
-        self.controller.disable_all_reporting()
+        self.controller.stop_analog_streaming(owner=self)  # the channels streamed by other plugins keep reporting
 
 
 if __name__ == '__main__':
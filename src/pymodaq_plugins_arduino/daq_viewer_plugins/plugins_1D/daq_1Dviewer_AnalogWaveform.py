@@ -0,0 +1,159 @@
+import numpy as np
+from pymodaq.utils.data import DataFromPlugins, DataToExport, Axis
+from pymodaq.control_modules.viewer_utility_classes import DAQ_Viewer_base, comon_parameters, main
+from pymodaq.utils.daq_utils import ThreadCommand
+from pymodaq.utils.parameter import Parameter
+
+from typing import List, Optional, TYPE_CHECKING
+
+from pymodaq_plugins_arduino.hardware.com_ports import PluginParams
+from pymodaq_plugins_arduino.hardware.controller_registry import acquire_controller, controller_registry
+from pymodaq_plugins_arduino.utils import Config
+
+if TYPE_CHECKING:
+    from pymodaq_plugins_arduino.hardware.arduino_telemetrix import Arduino
+
+
+config = Config()
+
+
+class DAQ_1DViewer_AnalogWaveform(DAQ_Viewer_base):
+    """ Instrument plugin class for a 1D viewer.
+
+    This object inherits all functionalities to communicate with PyMoDAQ’s DAQ_Viewer module through inheritance via
+    DAQ_Viewer_base. It makes a bridge between the DAQ_Viewer module and the Python wrapper of a particular instrument.
+
+    Each grab captures a block of N consecutive samples per active analog channel, streamed by the board at the
+    configured scan interval, and emits them as a Data1D with a time axis built from the samples timestamps. These
+    are the host times at which the reports were received (no board clock), so the axis includes the USB and thread
+    jitter. This plugin use the Telemetrix implementation developed here: (https://mryslab.github.io/telemetrix/).
+
+    This plugin needs to upload Telemetrix4Arduino to your Arduino-Core board (see Telemetrix installation)
+
+    Attributes:
+    -----------
+    controller: object
+        The particular object that allow the communication with the hardware, in general a python wrapper around the
+         hardware library.
+
+    """
+    _controller_units = ''
+    params = PluginParams(comon_parameters + [
+        {'title': 'Ports:', 'name': 'com_port', 'type': 'list',
+         'value': config('com_port'), 'limits': [config('com_port')]},
+        {'title': 'Number of samples:', 'name': 'n_samples', 'type': 'int', 'value': 100, 'min': 2},
+        {'title': 'Scan interval (ms):', 'name': 'scan_interval', 'type': 'int', 'value': 1,
+         'min': 0, 'max': 255},
+        {'title': 'Timeout (ms):', 'name': 'timeout', 'type': 'int', 'value': 100, 'min': 0,
+         'tip': 'Extra waiting time on top of the expected duration of the block'},
+        {'title': 'Channels:', 'name': 'channels', 'type': 'group', 'children': [
+            {'title': f'AI{ind}', 'name': f'AI{ind}', 'type': 'led_push', 'value': ind == 0,
+             'label': 'On/Off', 'tip': 'click to change status, Green: On, Red: Off'}
+            for ind in range(6)]},
+    ])
+
+    def ini_attributes(self):
+        self.controller: Optional['Arduino'] = None
+
+    def commit_settings(self, param: Parameter):
+        """Apply the consequences of a change of value in the detector settings
+
+        Parameters
+        ----------
+        param: Parameter
+            A given parameter (within detector_settings) whose value has been changed by the user
+        """
+        if param.parent().name() == 'channels':
+            if not param.value():
+                self.controller.stop_analog_streaming(int(param.name()[2:3]), owner=self)
+        elif param.name() == 'scan_interval':
+            self.controller.set_analog_scan_interval(param.value())
+
+    def get_active_channels(self) -> List[int]:
+        """Get the analog channels activated by the user"""
+        return [int(param.name()[2:3]) for param in self.settings.child('channels').children()
+                if param.value()]
+
+    def ini_detector(self, controller=None):
+        """Detector communication initialization
+
+        Parameters
+        ----------
+        controller: (object)
+            custom object of a PyMoDAQ plugin (Slave case). None if only one actuator/detector by controller
+            (Master case)
+
+        Returns
+        -------
+        info: str
+        initialized: bool
+            False if initialization failed otherwise True
+        """
+
+        self.ini_detector_init(slave_controller=controller)
+
+        if self.is_master:
+            self.controller = acquire_controller(self.settings['com_port'])
+
+        info = "Analog waveform ready"
+        initialized = True
+        return info, initialized
+
+    def close(self):
+        """Terminate the communication protocol"""
+        if self.is_master:
+            self.stop()
+            controller_registry.release(self.controller)
+
+    def grab_data(self, Naverage=1, **kwargs):
+        """Start a grab from the detector
+
+        Parameters
+        ----------
+        Naverage: int
+            Number of hardware averaging (if hardware averaging is possible, self.hardware_averaging should be set to
+            True in class preamble and you should code this implementation)
+        kwargs: dict
+            others optionals arguments
+        """
+        channels = self.get_active_channels()
+        if len(channels) == 0:
+            self.emit_status(ThreadCommand('Update_Status', ['No active analog channel']))
+            return
+        n_samples = self.settings['n_samples']
+        timeout = (self.settings['timeout'] + n_samples * max(1, self.settings['scan_interval'])) / 1000
+
+        indexes = [self.controller.get_analog_buffer(channel).count for channel in channels]
+        for channel in channels:  # nothing sent to the board for the channels already streamed
+            self.controller.start_analog_streaming(channel, self.settings['scan_interval'], owner=self)
+
+        fresh = True
+        for channel, index in zip(channels, indexes):
+            fresh = self.controller.wait_for_analog_sample(channel, index + n_samples - 1, timeout) and fresh
+        if not fresh:
+            self.emit_status(ThreadCommand('Update_Status',
+                                           [f'Less than {n_samples} samples received within the timeout']))
+
+        blocks = [self.controller.get_analog_buffer(channel).read_since(index)[:2]
+                  for channel, index in zip(channels, indexes)]
+        length = min(n_samples, min(len(values) for _, values in blocks))
+        if length == 0:
+            return
+
+        timestamps = blocks[0][0][:length]
+        time_axis = Axis('time', units='s', data=timestamps - timestamps[0], index=0)
+
+        self.dte_signal.emit(DataToExport(name='Analog Waveform',
+                                          data=[DataFromPlugins(name='AI',
+                                                                data=[values[:length] for _, values in blocks],
+                                                                dim='Data1D',
+                                                                labels=[f'AI{channel} data ' for channel in channels],
+                                                                axes=[time_axis])]))
+
+    def stop(self):
+        """Stop the current grab hardware wise if necessary"""
+        self.controller.stop_analog_streaming(owner=self)  # the channels streamed by other plugins keep reporting
+
+
+if __name__ == '__main__':
+    main(__file__)
@@ -0,0 +1,203 @@
+from pathlib import Path
+from queue import Queue, Empty, Full
+from threading import Event, Lock, Thread
+from time import perf_counter
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+import tables
+
+from pymodaq_plugins_arduino.hardware.analog_buffer import AnalogRingBuffer
+
+export_formats = ('hdf5', 'binary')
+sample_dtype = np.dtype([('timestamp', '<f8'), ('value', '<f8')])  # record of the binary files
+
+
+class AnalogStreamExporter(Thread):
+    """ Background thread appending timestamped analog samples to a file
+
+    The samples are given as blocks (arrays of timestamps and values) either pushed with write, or read by the
+    thread itself from the ring buffers of the followed channels (follow), so that the acquisition never waits for
+    the disk. The blocks pushed with write go through a bounded queue: when the queue is full the block is dropped
+    (and counted in dropped_samples) instead of blocking the acquisition, so the memory used is bounded.
+
+    In the hdf5 format, each channel is a group of the file with two extendable arrays (timestamps and values),
+    chunked and optionally compressed. In the binary format, each channel is a file of (timestamp, value) float64
+    records (see sample_dtype) next to the given path, named <stem>_<channel>.bin, readable with numpy.fromfile.
+
+    Parameters
+    ----------
+    path: str or Path
+        The hdf5 file (created or overwritten) or the base path of the binary files
+    export_format: str
+        'hdf5' or 'binary'
+    compression: str or None
+        The compression library of the hdf5 arrays ('zlib', 'blosc', 'blosc2'...) or None
+    complevel: int
+        The compression level, from 0 to 9
+    chunk_size: int
+        The number of samples of a chunk of the hdf5 arrays
+    max_blocks: int
+        The maximum number of blocks waiting in the queue
+    period: float
+        The time in seconds between two reads of the followed ring buffers
+    flush_interval: float
+        The maximum time in seconds between two flushes of the file(s) to the disk
+    """
+
+    def __init__(self, path: Union[str, Path], export_format: str = 'hdf5', compression: Optional[str] = 'zlib',
+                 complevel: int = 5, chunk_size: int = 4096, max_blocks: int = 1000, period: float = 0.1,
+                 flush_interval: float = 5.):
+        super().__init__(daemon=True)
+        if export_format not in export_formats:
+            raise ValueError(f'Unknown export format {export_format}, should be one of {export_formats}')
+        self.path = Path(path)
+        self.export_format = export_format
+        self.chunk_size = chunk_size
+        self.period = period
+        self.flush_interval = flush_interval
+        if compression is None or export_format == 'binary':
+            self._filters = None
+        else:
+            self._filters = tables.Filters(complevel=complevel, complib=compression, shuffle=True)
+        self.written_samples = 0
+        self.dropped_samples = 0  # because the queue was full
+        self.lost_samples = 0  # overwritten in a followed ring buffer before being read
+        self._queue: Queue = Queue(max_blocks)
+        self._followed: Dict[str, Tuple[AnalogRingBuffer, int]] = {}
+        self._followed_lock = Lock()
+        self._running = Event()
+        self._running.set()
+        self._stop_lock = Lock()
+        self._closed = False
+        self._file: Optional[tables.File] = None
+        self._binary_files = {}
+        self._arrays: Dict[str, Tuple[tables.EArray, tables.EArray]] = {}
+        if export_format == 'hdf5':
+            self._file = tables.open_file(str(self.path), mode='w', title='Arduino analog stream')
+
+    def write(self, channel: str, timestamps: np.ndarray, values: np.ndarray) -> bool:
+        """ Queue a block of samples of a channel, never waiting
+
+        Returns
+        -------
+        bool: False if the queue was full and the block has been dropped
+        """
+        try:
+            self._queue.put_nowait((channel, np.array(timestamps, dtype=float), np.array(values, dtype=float)))
+        except Full:
+            self.dropped_samples += len(values)
+            return False
+        return True
+
+    def follow(self, channel: str, buffer: AnalogRingBuffer, from_start: bool = False):
+        """ Save all the samples appended to a ring buffer, read by the writer thread every period
+
+        The period should be shorter than the time needed to fill the buffer, otherwise the overwritten samples
+        are counted in lost_samples
+
+        Parameters
+        ----------
+        channel: str
+            The name of the channel in the file, for instance AI0
+        buffer: AnalogRingBuffer
+            For instance the one returned by Arduino.get_analog_buffer
+        from_start: bool
+            If True, the samples still in the buffer are saved too, otherwise only the new ones
+        """
+        with self._followed_lock:  # never waits for the queue of the blocks
+            self._followed[channel] = (buffer, buffer.count - len(buffer) if from_start else buffer.count)
+
+    def stop(self, timeout: Optional[float] = None):
+        """ Save the remaining samples, close the file(s) and stop the thread, nothing is done once stopped"""
+        self._running.clear()
+        with self._stop_lock:
+            if self.ident is None:  # never started, save from the calling thread
+                self.run()
+            elif self.is_alive():
+                self.join(timeout)
+
+    def run(self):
+        if self._closed:  # stopped before being started
+            return
+        last_flush = perf_counter()
+        try:
+            while self._running.is_set():
+                self._write_queued(self.period)
+                self._read_followed()
+                if perf_counter() - last_flush > self.flush_interval:
+                    self._flush()
+                    last_flush = perf_counter()
+            self._read_followed()
+            self._write_queued()
+        finally:
+            self._close()
+
+    def _write_queued(self, timeout: Optional[float] = None):
+        """ Write the blocks of the queue, waiting at most timeout for the first one (don't wait if None)"""
+        while True:
+            try:
+                item = self._queue.get(timeout=timeout) if timeout is not None else self._queue.get_nowait()
+            except Empty:
+                return
+            timeout = None
+            self._append(*item)
+
+    def _read_followed(self):
+        with self._followed_lock:
+            followed = dict(self._followed)
+        for channel, (buffer, index) in followed.items():
+            timestamps, values, new_index = buffer.read_since(index)
+            self.lost_samples += max(new_index - index - len(values), 0)  # the buffer may have been cleared
+            with self._followed_lock:
+                if self._followed.get(channel, (None,))[0] is buffer:  # not followed again in between
+                    self._followed[channel] = (buffer, new_index)
+            self._append(channel, timestamps, values)
+
+    def _append(self, channel: str, timestamps: np.ndarray, values: np.ndarray):
+        if len(values) == 0:
+            return
+        if self.export_format == 'hdf5':
+            if channel not in self._arrays:
+                group = self._file.create_group('/', channel)
+                self._arrays[channel] = tuple(
+                    self._file.create_earray(group, name, tables.Float64Atom(), shape=(0,), filters=self._filters,
+                                             chunkshape=(self.chunk_size,))
+                    for name in ('timestamps', 'values'))
+            self._arrays[channel][0].append(timestamps)
+            self._arrays[channel][1].append(values)
+        else:
+            if channel not in self._binary_files:
+                self._binary_files[channel] = open(binary_path(self.path, channel), 'wb')
+            samples = np.empty((len(values),), dtype=sample_dtype)
+            samples['timestamp'] = timestamps
+            samples['value'] = values
+            self._binary_files[channel].write(samples.tobytes())
+        self.written_samples += len(values)
+
+    def _flush(self):
+        if self._file is not None:
+            self._file.flush()
+        for file in self._binary_files.values():
+            file.flush()
+
+    def _close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._file is not None:
+            self._file.close()
+        for file in self._binary_files.values():
+            file.close()
+
+
+def binary_path(path: Union[str, Path], channel: str) -> Path:
+    """ The file of a channel saved in the binary format"""
+    path = Path(path)
+    return path.with_name(f'{path.stem}_{channel}.bin')
+
+
+def read_binary(path: Union[str, Path], channel: str) -> Tuple[np.ndarray, np.ndarray]:
+    """ Read the timestamps and values of a channel saved in the binary format"""
+    samples = np.fromfile(binary_path(path, channel), dtype=sample_dtype)
+    return samples['timestamp'], samples['value']
@@ -1,15 +1,16 @@
-import numpy as np
-from qtpy import QtWidgets
+from typing import TYPE_CHECKING
 
-from pyqtgraph.widgets.ColorButton import ColorButton
+import numpy as np
+from qtpy import QtWidgets, QtCore
 
 from pymodaq.utils import gui_utils as gutils
 from pymodaq.utils.config import Config, get_set_preset_path, ConfigError
+from pymodaq.utils.daq_utils import ThreadCommand
+from pymodaq.utils.data import DataActuator
 from pymodaq.utils.logger import set_logger, get_module_name
 
-from pymodaq.utils.managers.modules_manager import ModulesManager
-from pymodaq.control_modules.daq_move import DAQ_Move
-from pymodaq.utils.gui_utils.widgets.lcd import LCD
+if TYPE_CHECKING:  # widgets and control modules are only imported when the extension is opened
+    from pymodaq.utils.managers.modules_manager import ModulesManager
 
 # todo: replace here *pymodaq_plugins_template* by your plugin package name
 from pymodaq_plugins_arduino.utils import Config as PluginConfig
@@ -32,7 +33,10 @@ class ColorSynthesizer(gutils.CustomApp):
     # todo: if you wish to create custom Parameter and corresponding widgets. These will be
     # automatically added as children of self.settings. Morevover, the self.settings_tree will
     # render the widgets in a Qtree. If you wish to see it in your app, add is into a Dock
-    params = []
+    params = [
+        {'title': 'Max update rate (Hz):', 'name': 'max_rate', 'type': 'float', 'value': 20., 'min': 0.1,
+         'tip': 'Colours picked faster than this are skipped, the last one is always applied'},
+    ]
 
     def __init__(self, parent: gutils.DockArea, dashboard):
         super().__init__(parent, dashboard)
@@ -40,10 +44,17 @@ class ColorSynthesizer(gutils.CustomApp):
         # info: in an extension, if you want to interact with ControlModules you have to use the
         # object: self.modules_manager which is a ModulesManager instance from the dashboard
 
+        self._pending_color = None
+        self._refresh_pending = False  # the Green and Blue values are refreshed once the Red plugin has written
+        self._update_timer = QtCore.QTimer()
+        self._update_timer.setSingleShot(True)
+        self._update_timer.timeout.connect(self.apply_pending_color)
+
         self.setup_ui()
 
         self.red_mod, self.green_mod, self.blue_mod = (
             self.modules_manager.get_mods_from_names(['Red', 'Green', 'Blue'], 'act'))
+        self.red_mod.move_done_signal.connect(self.refresh_values)
 
     def setup_docks(self):
         """Mandatory method to be subclassed to setup the docks layout
@@ -59,6 +70,8 @@ class ColorSynthesizer(gutils.CustomApp):
         --------
         pyqtgraph.dockarea.Dock
         """
+        from pymodaq.utils.gui_utils.widgets.lcd import LCD
+
         self.docks['color'] = gutils.Dock('Color')
         self.dockarea.addDock(self.docks['color'])
         widget = QtWidgets.QWidget()
@@ -81,26 +94,70 @@ class ColorSynthesizer(gutils.CustomApp):
         --------
         ActionManager.add_action
         """
+        from pyqtgraph.widgets.ColorButton import ColorButton
+
         self.add_widget('color', ColorButton)
 
     def connect_things(self):
         """Connect actions and/or other widgets signal to methods"""
-        self.connect_action('color', self.set_color, signal_name='sigColorChanging')
+        self.connect_action('color', self.request_color, signal_name='sigColorChanging')
+        self.connect_action('color', self.request_color, signal_name='sigColorChanged')
 
     @property
-    def modules_manager(self) -> ModulesManager:
+    def modules_manager(self) -> 'ModulesManager':
         return super().modules_manager
 
-    def set_color(self):
-        red, green, blue, alpha = self.get_action('color').color().getRgb()
-        self.red_mod.move_abs(red)
-        self.green_mod.move_abs(green)
-        self.blue_mod.move_abs(blue)
+    def request_color(self):
+        """ Apply the picked colour, at most max_rate times per second
+
+        While the user drags in the colour dialog, only the latest colour is kept and applied at the end
+        of the current period, the intermediate ones are dropped.
+        """
+        self._pending_color = self.get_action('color').color().getRgb()[:3]
+        if not self._update_timer.isActive():
+            self.apply_pending_color()
+
+    def apply_pending_color(self):
+        if self._pending_color is None:
+            return
+        color, self._pending_color = self._pending_color, None
+        self.set_color(*color)
+        self._update_timer.start(int(1000 / self.settings['max_rate']))
+
+    def single_board(self) -> bool:
+        """ True if the three actuators are initialized LED axes of the same board"""
+        mods = (self.red_mod, self.green_mod, self.blue_mod)
+        return (all(mod.initialized_state and mod.actuator in ('LED', 'LEDwithLCD') for mod in mods) and
+                len({mod.settings['move_settings', 'com_port'] for mod in mods}) == 1)
+
+    def set_color(self, red: int, green: int, blue: int):
+        """ Set the levels of the three channels
+
+        If the three actuators are LED axes of the same board, the levels are sent to the plugin of the Red
+        actuator (move_axes_abs custom command, executed in its thread), which writes the three calibrated PWM
+        values in a single message so that no intermediate colour is displayed. Otherwise each actuator is moved
+        on its own.
+        """
+        levels = (float(red), float(green), float(blue))
+        if self.single_board():
+            self._refresh_pending = True
+            self.red_mod.command_hardware.emit(
+                ThreadCommand('move_axes_abs', [dict(zip(('Red', 'Green', 'Blue'), levels))]))
+        else:
+            for mod, level in zip((self.red_mod, self.green_mod, self.blue_mod), levels):
+                mod.move_abs(DataActuator(data=level))
 
         self.lcd.setvalues([np.array([red]),
                             np.array([green]),
                             np.array([blue])])
 
+    def refresh_values(self):
+        """ Refresh the values of the Green and Blue actuators once the Red plugin has written a colour"""
+        if self._refresh_pending:
+            self._refresh_pending = False
+            self.green_mod.get_actuator_value()
+            self.blue_mod.get_actuator_value()
+
     def setup_menu(self):
         """Non mandatory method to be subclassed in order to create a menubar
 
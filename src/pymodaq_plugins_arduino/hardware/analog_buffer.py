@@ -0,0 +1,114 @@
+from threading import Condition
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+class AnalogRingBuffer:
+    """ Preallocated ring buffer of timestamped analog samples
+
+    The samples are stored in two fixed size numpy arrays (timestamps and values) so that appending
+    from the Telemetrix reporting thread never allocates memory. Each sample gets an absolute index
+    (the number of samples appended before it) used to read all the samples received since a given
+    index. When the buffer is full, the oldest samples are overwritten.
+
+    The absolute index is also a sequence counter: waiting for a sample newer than a given index
+    lets a reader get a fresh sample without sleeping a fixed amount of time.
+
+    Parameters
+    ----------
+    size: int
+        The maximum number of samples kept in memory
+    """
+
+    def __init__(self, size: int = 10000):
+        if size < 1:
+            raise ValueError('The size of the buffer should be a positive integer')
+        self._size = size
+        self._timestamps = np.zeros((size,), dtype=float)
+        self._values = np.zeros((size,), dtype=float)
+        self._count = 0
+        self._condition = Condition()
+
+    @property
+    def size(self) -> int:
+        """ The maximum number of samples kept in memory"""
+        return self._size
+
+    @property
+    def count(self) -> int:
+        """ The total number of samples appended so far, also the index of the next sample"""
+        return self._count
+
+    def __len__(self):
+        return min(self._count, self._size)
+
+    def append(self, timestamp: float, value: float):
+        """ Store a new sample, overwriting the oldest one if the buffer is full"""
+        with self._condition:
+            index = self._count % self._size
+            self._timestamps[index] = timestamp
+            self._values[index] = value
+            self._count += 1
+            self._condition.notify_all()
+
+    def wait_for(self, index: int, timeout: Optional[float] = None) -> bool:
+        """ Wait until the sample of absolute index has been appended
+
+        Parameters
+        ----------
+        index: int
+            The absolute index of the expected sample, for instance the count before a request
+        timeout: float or None
+            The maximum waiting time in seconds, None to wait forever
+
+        Returns
+        -------
+        bool: True if the sample has been received, False if the timeout elapsed
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._count > index, timeout)
+
+    def clear(self):
+        """ Forget all the stored samples, the absolute indexes restart from 0"""
+        with self._condition:
+            self._count = 0
+
+    def read_since(self, index: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        """ Get all the samples appended since the absolute index
+
+        If some of these samples have already been overwritten, only the ones still in memory are
+        returned.
+
+        Parameters
+        ----------
+        index: int
+            The absolute index of the first sample to read, typically the index returned by a
+            previous call
+
+        Returns
+        -------
+        np.ndarray: the timestamps
+        np.ndarray: the values
+        int: the absolute index to use for the next call
+        """
+        with self._condition:
+            count = self._count
+            timestamps, values = self._take(max(index, count - self._size, 0), count)
+        return timestamps, values, count
+
+    def read_last(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """ Get the n last samples (or less if less samples have been received)
+
+        Returns
+        -------
+        np.ndarray: the timestamps
+        np.ndarray: the values
+        """
+        with self._condition:
+            count = self._count
+            return self._take(max(count - min(n, self._size), 0), count)
+
+    def _take(self, start: int, stop: int) -> Tuple[np.ndarray, np.ndarray]:
+        indexes = np.arange(start, stop) % self._size
+        return self._timestamps[indexes], self._values[indexes]
@@ -1,23 +1,43 @@
 import numbers
-from threading import Lock, Event
-from pyvisa import ResourceManager
+from concurrent.futures import Future
+from threading import RLock, Timer
+from typing import Dict, Hashable, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
 from telemetrix import telemetrix
+from serial.serialutil import SerialException
+from telemetrix.private_constants import PrivateConstants
+
+from pymodaq_plugins_arduino.hardware.analog_buffer import AnalogRingBuffer
+from pymodaq_plugins_arduino.hardware.com_ports import get_com_ports
+from pymodaq_plugins_arduino.hardware.control_loop import ControlLoop
+from pymodaq_plugins_arduino.hardware.motion_profile import TrapezoidalProfile
+from pymodaq_plugins_arduino.hardware.stepper_tracker import StepperPositionTracker
+
 
-lock = Lock()
+def __getattr__(name):
+    if name == 'COM_PORTS':  # back compatibility, the ports are now discovered on demand
+        return get_com_ports()
+    raise AttributeError(f'module {__name__} has no attribute {name}')
 
-VISA_rm = ResourceManager()
-COM_PORTS = []
-for name, rinfo in VISA_rm.list_resources_info().items():
-    if rinfo.alias is not None:
-        COM_PORTS.append(rinfo.alias)
-    else:
-        COM_PORTS.append(name)
+
+class _ComPorts:
+    """ Class attribute giving the available COM ports, only discovered when it is read"""
+    def __get__(self, instance, owner):
+        return get_com_ports()
 
 
 class Arduino(telemetrix.Telemetrix):
-    COM_PORTS = COM_PORTS
+    COM_PORTS = _ComPorts()  # back compatibility, use get_com_ports
+    analog_buffer_size = 10000  # number of timestamped samples kept in memory for each analog input
+    lock_names = ('pwm', 'analog', 'i2c', 'servo', 'stepper')  # independent subsystems of a board
+    stepper_enable_policies = ('always_on', 'per_move', 'idle_timeout')
+    serial_buffer_size = 60  # bytes, grouped commands are written in chunks fitting the board serial buffer
 
     def __init__(self, *args, **kwargs):
+        # locks are scoped to this board, they have to exist before the parent init sends commands
+        self._transport_lock = RLock()
+        self.locks = {name: RLock() for name in self.lock_names}
         super().__init__(*args, **kwargs)
         self.pin_values_output = {}
         self.analog_pin_values_input = {0: 0,
@@ -26,24 +46,97 @@ class Arduino(telemetrix.Telemetrix):
                                         3: 0,
                                         4: 0,
                                         5: 0}  # Initialized dictionary for 6 analog channels
-        self.stepper_motor = None
+        self.analog_buffers = {pin: AnalogRingBuffer(self.analog_buffer_size)
+                               for pin in self.analog_pin_values_input}
+        self._analog_stream_owners: Dict[int, Set[Hashable]] = {}  # keyed by analog pin, the users streaming it
+        self.control_loops: Dict[int, ControlLoop] = {}  # keyed by analog pin, run in read_analog_pin
+        self.stepper_motor: Optional[int] = None  # the default motor, the first initialized one
+        self.stepper_pins: Dict[int, Tuple[int, int]] = {}  # pulse and direction pins of each motor
+        self.stepper_enable_pins: Dict[int, int] = {}
+        self.stepper_trackers: Dict[int, StepperPositionTracker] = {}
+        self._stepper_moves: Dict[int, Future] = {}
+        self._stepper_stopped: Dict[int, bool] = {}
+        self._stepper_parameters: Dict[int, Dict[str, int]] = {}  # last speed/acceleration sent to each motor
+        self.stepper_profiles: Dict[int, TrapezoidalProfile] = {}  # profile of the current (or last) move
+        self._stepper_pending_durations: Dict[int, float] = {}  # duration of the queued segments not yet sent
+        self.stepper_enable_policy = 'per_move'
+        self.stepper_idle_timeout = 5.
+        self._stepper_enabled: Dict[int, bool] = {}  # keyed by enable pin
+        self._stepper_idle_timers: Dict[int, Timer] = {}  # keyed by enable pin
                 
+    def _send_command(self, command):
+        """ Serialize the writes on the serial port of this board, subsystems may be used from
+        several threads"""
+        with self._transport_lock:
+            super()._send_command(command)
+
+    def _send_commands(self, commands: Sequence[Sequence[int]]):
+        """ Send several commands in as few writes as possible
+
+        Each command is framed as by _send_command (its length first) and the frames are grouped in writes fitting
+        the board serial buffer. Write errors take the same path as in _send_command
+        """
+        message = []
+        with self._transport_lock:
+            for command in commands:
+                frame = [len(command)] + list(command)
+                if len(message) + len(frame) > self.serial_buffer_size and len(message) > 0:
+                    self._write_message(bytes(message))
+                    message = []
+                message.extend(frame)
+            if len(message) > 0:
+                self._write_message(bytes(message))
+
+    def _write_message(self, message: bytes):
+        if self.serial_port:
+            try:
+                self.serial_port.write(message)
+            except SerialException:
+                if self.shutdown_on_exception:
+                    self.shutdown()
+                raise RuntimeError('write fail in _send_commands')
+        elif self.ip_address:
+            self.sock.sendall(message)
+        else:
+            raise RuntimeError('No serial port or ip address set.')
+
     @staticmethod
-    def round_value(value):
-        return max(0, min(255, int(value)))
+    def round_value(value: Union[numbers.Number, np.ndarray]) -> Union[int, np.ndarray]:
+        """ The PWM value(s) of a value (or an array of values): rounded to the nearest integer and clipped to 0-255"""
+        value = np.clip(np.round(value), 0, 255).astype(int)
+        return int(value) if np.ndim(value) == 0 else value
+
+    def set_pins_output_to(self, value: int, pins=None):
+        """ Write the same value to the given output pins, by default to all the memorized ones"""
+        self.locks['pwm'].acquire()
+        for pin in list(self.pin_values_output) if pins is None else pins:
+            self.analog_write(pin, self.round_value(value))
+        self.locks['pwm'].release()
 
-    def set_pins_output_to(self, value: int):
-        lock.acquire()
-        for pin in self.pin_values_output:
-            self.analog_write(pin, int(value))
-        lock.release()
+    def write_pins(self, values: Dict[int, numbers.Number]):
+        """ Write several PWM outputs at once
+
+        The values are rounded and clipped to 0-255 together, the commands are sent in a single write under
+        one acquisition of the pwm lock, so that no other write is interleaved, and memorized in one step.
+
+        :param values: the value of each pin, keyed by pin number
+        """
+        if len(values) == 0:
+            return
+        pins = list(values.keys())
+        outputs = self.round_value(np.fromiter(values.values(), dtype=float, count=len(values))).tolist()
+        self.locks['pwm'].acquire()
+        self._send_commands([[PrivateConstants.ANALOG_WRITE, pin, output >> 8, output & 0xff]  # as analog_write
+                             for pin, output in zip(pins, outputs)])
+        self.pin_values_output.update(zip(pins, outputs))
+        self.locks['pwm'].release()
 
     def analog_write_and_memorize(self, pin, value):
-        lock.acquire()
+        self.locks['pwm'].acquire()
         value = self.round_value(value)
         self.analog_write(pin, value)
         self.pin_values_output[pin] = value
-        lock.release()
+        self.locks['pwm'].release()
 
     def read_analog_pin(self, data):
         """
@@ -51,92 +144,450 @@ class Arduino(telemetrix.Telemetrix):
         Data[0]: pin_type (not used here)
         Data[1]: pin_number: i.e. 0 is A0 etc.
         Data[2]: pin_value: an integer between 0 and 1023 (with an Arduino UNO)
-        Data[3]: raw_time_stamp (not used here)
+        Data[3]: time_stamp: the host time.time() at which the Telemetrix reader thread received the report
         :param data: a list in which are loaded the acquisition parameter analog input
         :return: a dictionary with the following structure {pin_number(int):pin_value(int)}
         With an arduino up to 6 analog input might be interrogated at the same time
+        Each sample is also stored with its timestamp in the ring buffer of the pin and fed to the control
+        loop of the pin if any
         """
         self.analog_pin_values_input[data[1]] = data[2]  # data are integer from 0 to 1023 in case Arduino UNO
+        self.get_analog_buffer(data[1]).append(data[3], data[2])
+        control_loop = self.control_loops.get(data[1])
+        if control_loop is not None:
+            control_loop.update(data[3], data[2])
 
-    def set_analog_input(self, pin):
+    def get_analog_buffer(self, pin: int) -> AnalogRingBuffer:
+        """ Get the ring buffer storing the timestamped samples of an analog pin"""
+        if pin not in self.analog_buffers:
+            self.analog_buffers.setdefault(pin, AnalogRingBuffer(self.analog_buffer_size))
+        return self.analog_buffers[pin]
+
+    def set_analog_input(self, pin, timeout: float = None) -> bool:
         """
         Activate the analog pin, make an acquisition, write in the callback, stop the analog reporting
         :param pin: pin number 1 is A1 etc...
-        :return: acquisition parameters in the declared callback
+        :param timeout: if not None, wait (at most timeout seconds) for a sample newer than the
+            request before stopping the analog reporting
+        :return: acquisition parameters in the declared callback. True if a fresh sample has been
+            received (always True if timeout is None)
         The differential parameter:
             When comparing the previous value and the current value, if the
             difference exceeds the differential. This value needs to be equaled
             or exceeded for a callback report to be generated.
+        A pin streamed by a user of the board is only waited for, its reporting is left enabled
+        """
+        fresh = True
+        index = self.get_analog_buffer(pin).count
+        self.locks['analog'].acquire()
+        if pin not in self._analog_stream_owners:
+            self.set_pin_mode_analog_input(pin, differential=0, callback=self.read_analog_pin)
+            self.set_analog_scan_interval(1)
+            if timeout is None:
+                self.disable_analog_reporting(pin)
+        self.locks['analog'].release()
+        if timeout is not None:
+            fresh = self.wait_for_analog_sample(pin, index, timeout)
+            self.locks['analog'].acquire()
+            if pin not in self._analog_stream_owners:  # may have been started by another user in between
+                self.disable_analog_reporting(pin)
+            self.locks['analog'].release()
+        return fresh
+
+    def wait_for_analog_sample(self, pin: int, index: int, timeout: float = None) -> bool:
+        """
+        Wait for a sample of the analog pin newer than a given sequence index
+        :param pin: pin number 1 is A1 etc...
+        :param index: the sequence index (count of the pin buffer) at the time of the request
+        :param timeout: maximum waiting time in seconds, None to wait forever
+        :return: True if a fresh sample has been received, False if the timeout elapsed
         """
-        lock.acquire()
-        self.set_pin_mode_analog_input(pin, differential=0, callback=self.read_analog_pin)
-        self.set_analog_scan_interval(1)
-        self.disable_analog_reporting(pin)
-        lock.release()
+        return self.get_analog_buffer(pin).wait_for(index, timeout)
+
+    @property
+    def analog_streaming_pins(self) -> Set[int]:
+        """ The analog pins whose reporting is enabled, by any user of the board"""
+        self.locks['analog'].acquire()
+        pins = set(self._analog_stream_owners)
+        self.locks['analog'].release()
+        return pins
+
+    def start_analog_streaming(self, pin: int, scan_interval: int = 1, owner: Hashable = None):
+        """
+        Activate the analog pin and keep its reporting enabled so that the callback continuously
+        updates the analog values
+        The streamed pins are reference counted by owner (for instance each plugin sharing the board): the
+        reporting is enabled, with the given scan interval, by the first owner of a pin and starting an already
+        streamed pin sends nothing to the board
+        :param pin: pin number 1 is A1 etc...
+        :param scan_interval: the board analog scan interval in ms (between 0 and 255)
+        :param owner: the user of the pin, None for an anonymous one
+        """
+        self.locks['analog'].acquire()
+        if pin not in self._analog_stream_owners:
+            self.set_pin_mode_analog_input(pin, differential=0, callback=self.read_analog_pin)
+            self.set_analog_scan_interval(scan_interval)
+        self._analog_stream_owners.setdefault(pin, set()).add(owner)
+        self.locks['analog'].release()
+
+    def stop_analog_streaming(self, pin: int = None, owner: Hashable = None):
+        """
+        Release a streamed analog pin, its reporting is disabled when its last owner releases it
+        :param pin: pin number 1 is A1 etc... If None, all the pins streamed by owner are released
+        :param owner: the user of the pin given to start_analog_streaming
+        """
+        self.locks['analog'].acquire()
+        pins = [pin for pin, owners in self._analog_stream_owners.items() if owner in owners] if pin is None \
+            else [pin]
+        for pin in pins:
+            owners = self._analog_stream_owners.get(pin, set())
+            owners.discard(owner)
+            if len(owners) == 0:
+                self.disable_analog_reporting(pin)
+                self._analog_stream_owners.pop(pin, None)
+        self.locks['analog'].release()
+
+    def start_control_loop(self, analog_pin: int, pwm_pin: int, setpoint: float, kp: float = 1., ki: float = 0.,
+                           kd: float = 0., scan_interval: int = 1) -> ControlLoop:
+        """ Run a PID on an analog input, writing its output to a PWM pin at each analog report
+
+        The loop runs in the Telemetrix reporting thread so its rate is the analog report rate. Its setpoint and
+        gains can be changed at any time on the returned ControlLoop, which also records the timing of the
+        iterations.
+
+        :param analog_pin: the analog input (0 for A0...) measured by the loop
+        :param pwm_pin: the PWM output driven by the loop
+        :param setpoint: the target value of the analog input (0-1023 for an Arduino UNO)
+        :param scan_interval: the analog scan interval of the board in ms
+        """
+        self.set_pin_mode_analog_output(pwm_pin)
+        control_loop = ControlLoop(lambda output: self.write_pins({pwm_pin: output}), setpoint, kp, ki, kd)
+        self.control_loops[analog_pin] = control_loop
+        self.start_analog_streaming(analog_pin, scan_interval)
+        return control_loop
+
+    def stop_control_loop(self, analog_pin: int) -> Optional[ControlLoop]:
+        """ Stop the control loop of an analog input, the streaming of the input and the output are left as is"""
+        return self.control_loops.pop(analog_pin, None)
 
     def get_output_pin_value(self, pin: int) -> numbers.Number:
         value = self.pin_values_output.get(pin, 0)
         return value
 
     def ini_i2c(self, port: int = 0):
-        lock.acquire()
+        self.locks['i2c'].acquire()
         self.set_pin_mode_i2c(port)
-        lock.release()
+        self.locks['i2c'].release()
 
     def writeto(self, addr, bytes_to_write: bytes):
-        """ to use the interface proposed by the lcd_i2c package made for micropython originally"""
-        lock.acquire()
-        self.i2c_write(addr, [int.from_bytes(bytes_to_write, byteorder='big')])
-        lock.release()
+        """ to use the interface proposed by the lcd_i2c package made for micropython originally
+
+        All the bytes are sent within a single i2c write command
+        """
+        self.locks['i2c'].acquire()
+        self.i2c_write(addr, list(bytes_to_write))
+        self.locks['i2c'].release()
 
     def servo_move_degree(self, pin: int, value: float):
         """ Move a servo motor to the value in degree between 0 and 180 degree"""
-        lock.acquire()
+        self.locks['servo'].acquire()
         self.servo_write(pin, int(value * 255 / 180))
         self.pin_values_output[pin] = value
-        lock.release()
+        self.locks['servo'].release()
 
     #Stepper Motor Methods
-    def initialize_stepper_motor(self, pulse_pin, direction_pin, enable_pin=7):
-        """ Initialize the stepper motor with the given pins """
-        self.stepper_motor = self.set_pin_mode_stepper(interface=1, pin1=pulse_pin, pin2=direction_pin)
-        self.enable = enable_pin
-        self.set_pin_mode_digital_output(self.enable) # Set the enable pin as digital output
-        self.digital_write(self.enable , 1) # Disable the motor driver to avoid electrical consumption
-        self.stepper_set_current_position(self.stepper_motor, 0) # Set the current position to 0
-
-    def move_stepper_to_position(self, position: float, max_speed=200, acceleration=400):
-        """ Move the stepper motor to the specified position """
+    def initialize_stepper_motor(self, pulse_pin, direction_pin, enable_pin=7, position_rate: float = 20.,
+                                 enable_policy='per_move', idle_timeout: float = 5.) -> int:
+        """ Initialize a stepper motor with the given pins
+
+        Several motors can be initialized on the same board, each one getting its own id. Initializing
+        again the pins of an existing motor returns its id (the board may be shared by several plugins).
+        The first initialized motor is the default one of the stepper methods.
+
+        position_rate is the maximum number of position requests per second while the motor is moving,
+        see set_stepper_enable_policy for enable_policy and idle_timeout
+
+        :return: the id of the motor
+        """
+        self.locks['stepper'].acquire()
+        for motor, pins in self.stepper_pins.items():
+            if pins == (pulse_pin, direction_pin):
+                self.locks['stepper'].release()
+                return motor
+        motor = self.set_pin_mode_stepper(interface=1, pin1=pulse_pin, pin2=direction_pin)
+        self.stepper_pins[motor] = (pulse_pin, direction_pin)
+        self.stepper_enable_pins[motor] = enable_pin
+        self._stepper_parameters[motor] = {}
+        self._stepper_stopped[motor] = False
+        if enable_pin not in self._stepper_enabled:  # the enable pin may be common to several drivers
+            self.set_pin_mode_digital_output(enable_pin) # Set the enable pin as digital output
+            self.digital_write(enable_pin, 1) # Disable the motor driver to avoid electrical consumption
+            self._stepper_enabled[enable_pin] = False
+        self.stepper_set_current_position(motor, 0) # Set the current position to 0
+        self.stepper_trackers[motor] = StepperPositionTracker(self, motor, position_rate)
+        self.stepper_trackers[motor].start()
+        if self.stepper_motor is None:
+            self.stepper_motor = motor
+        self.set_stepper_enable_policy(enable_policy, idle_timeout)
+        self.locks['stepper'].release()
+        return motor
+
+    def set_stepper_enable_policy(self, policy: str, idle_timeout: float = 5.):
+        """ Set when the stepper drivers are enabled (holding current) using their enable pin
+
+        :param policy: one of
+            * 'always_on': the drivers are enabled at once and stay enabled
+            * 'per_move': a driver is enabled before each move (or queue) and disabled at its end
+            * 'idle_timeout': a driver is enabled before each move and disabled only after idle_timeout
+              seconds without motion, so that close moves don't pay the driver wake up time
+        :param idle_timeout: time in seconds without motion before disabling a driver ('idle_timeout' policy)
+        """
+        if policy not in self.stepper_enable_policies:
+            raise ValueError(f'Unknown enable policy {policy}, should be one of {self.stepper_enable_policies}')
+        self.locks['stepper'].acquire()
+        self.stepper_enable_policy = policy
+        self.stepper_idle_timeout = idle_timeout
+        for motor in self.stepper_pins:
+            if policy == 'always_on':
+                self._enable_stepper_driver(motor)
+            elif not self.is_stepper_moving(motor):
+                self._release_stepper_driver(motor)
+        self.locks['stepper'].release()
+
+    def is_stepper_moving(self, motor: int = None) -> bool:
+        """ True if a move (or a queue) of the motor is pending"""
+        move = self._stepper_moves.get(self.stepper_motor if motor is None else motor)
+        return move is not None and not move.done()
+
+    def _enable_stepper_driver(self, motor: int):
+        """ Enable the driver of the motor (enable pin low) if not already enabled"""
+        enable_pin = self.stepper_enable_pins[motor]
+        self.locks['stepper'].acquire()
+        timer = self._stepper_idle_timers.pop(enable_pin, None)
+        if timer is not None:
+            timer.cancel()
+        if not self._stepper_enabled[enable_pin]:
+            self.digital_write(enable_pin, 0)
+            self._stepper_enabled[enable_pin] = True
+        self.locks['stepper'].release()
+
+    def _disable_stepper_driver(self, enable_pin: int):
+        """ Disable the drivers using this enable pin (pin high) unless one of their motors is moving"""
+        self.locks['stepper'].acquire()
+        self._stepper_idle_timers.pop(enable_pin, None)
+        if self._stepper_enabled[enable_pin] and not any(
+                self.is_stepper_moving(motor) for motor, pin in self.stepper_enable_pins.items()
+                if pin == enable_pin):
+            self.digital_write(enable_pin, 1)
+            self._stepper_enabled[enable_pin] = False
+        self.locks['stepper'].release()
+
+    def _release_stepper_driver(self, motor: int):
+        """ Apply the enable policy at the end of a move of the motor"""
+        enable_pin = self.stepper_enable_pins[motor]
+        if self.stepper_enable_policy == 'per_move':
+            self._disable_stepper_driver(enable_pin)
+        elif self.stepper_enable_policy == 'idle_timeout':
+            self.locks['stepper'].acquire()
+            timer = self._stepper_idle_timers.get(enable_pin)
+            if timer is not None:
+                timer.cancel()
+            timer = Timer(self.stepper_idle_timeout, self._disable_stepper_driver, args=(enable_pin,))
+            timer.daemon = True
+            self._stepper_idle_timers[enable_pin] = timer
+            timer.start()
+            self.locks['stepper'].release()
+
+    def _set_stepper_parameters(self, motor: int, max_speed: int, acceleration: int):
+        """ Send the speed and acceleration of the motor, only if they changed since the last move"""
+        parameters = self._stepper_parameters[motor]
+        if parameters.get('max_speed') != max_speed:
+            self.stepper_set_max_speed(motor, max_speed)
+            parameters['max_speed'] = max_speed
+        if parameters.get('acceleration') != acceleration:
+            self.stepper_set_acceleration(motor, acceleration)
+            parameters['acceleration'] = acceleration
+
+    def start_stepper_move(self, position: float, max_speed=200, acceleration=400, motor: int = None) -> Future:
+        """ Start moving the stepper motor to the specified position and return immediately
+
+        :return: a Future whose result is True when the motion is complete or False if it has been
+            stopped by stop_stepper
+        """
+        return self.start_stepper_queue([position], max_speed, acceleration, motor=motor)
+
+    def start_stepper_queue(self, positions: Sequence[float],
+                            max_speed: Union[int, Sequence[int]] = 200,
+                            acceleration: Union[int, Sequence[int]] = 400,
+                            motor: int = None) -> Future:
+        """ Move the stepper motor through the positions, one after the other, and return immediately
+
+        Each move is sent from the completion callback of the previous one, on the Telemetrix reporting
+        thread, so there is no round trip with the caller between the segments. The driver stays enabled
+        during the whole queue and the speed and acceleration are only sent when they change.
+
+        :param positions: the successive target positions in steps
+        :param max_speed: the maximum speed, either one for all the segments or one per segment
+        :param acceleration: the acceleration, either one for all the segments or one per segment
+        :param motor: the id of the motor, None for the default one
+        :return: a Future whose result is True when the last position is reached or False if the queue
+            has been stopped by stop_stepper (or replaced by another move)
+        """
         if self.stepper_motor is None:
             raise ValueError("Stepper motor not initialized. Call initialize_stepper_motor first.")
-        
-        # Set motor parameters
-        self.stepper_set_max_speed(self.stepper_motor, max_speed)
-        self.stepper_set_acceleration(self.stepper_motor, acceleration)
-        # Set the target position
-        self.stepper_move_to(self.stepper_motor, int(position))
-        completion_event = Event()
-        def completion_callback(data):
-            """ Callback function to signal that the stepper motor has completed its movement """
-            completion_event.set()
-        self.digital_write(self.enable, 0)
-        self.stepper_run(self.stepper_motor, completion_callback=completion_callback)
-        completion_event.wait()
-        self.digital_write(self.enable, 1)
-        return True
-
-    def get_stepper_position(self):
-        """ Retrieve the current position of the stepper motor """
-        position_event = Event()
-        def position_callback(data):
-            """ Callback function to retrieve the current position of the stepper motor """
-            self.position = data[2]
-            position_event.set()
-        
-        self.stepper_get_current_position(self.stepper_motor, 
-                                          current_position_callback=position_callback)
-        position_event.wait()
-        return self.position
+        if motor is None:
+            motor = self.stepper_motor
+        positions = np.round(np.ravel(np.asarray(positions, dtype=float))).astype(int)
+        max_speeds = np.broadcast_to(max_speed, positions.shape).astype(int)
+        accelerations = np.broadcast_to(acceleration, positions.shape).astype(int)
+        if np.any(max_speeds <= 0) or np.any(accelerations <= 0):
+            raise ValueError('The speed and the acceleration should be positive')
+        tracker = self.stepper_trackers[motor]
+
+        move = Future()
+        if len(positions) == 0:
+            move.set_result(True)
+            return move
+
+        def run_segment(index: int):
+            self._set_stepper_parameters(motor, int(max_speeds[index]), int(accelerations[index]))
+            self.stepper_move_to(motor, int(positions[index]))
+            self.stepper_profiles[motor] = TrapezoidalProfile(starts[index], positions[index],
+                                                              max_speeds[index], accelerations[index])
+            self._stepper_pending_durations[motor] = sum(durations[index + 1:])
+            self.stepper_run(motor, completion_callback=lambda data: completion_callback(index))
+
+        def completion_callback(index: int):
+            """ Callback function chaining the next segment or signaling the end of the movement """
+            self.locks['stepper'].acquire()
+            if self._stepper_moves.get(motor) is not move:  # stopped, or replaced by another move now in charge
+                self.locks['stepper'].release()
+                return
+            if index + 1 < len(positions) and not self._stepper_stopped[motor]:
+                run_segment(index + 1)
+                self.locks['stepper'].release()
+                return
+            self.locks['stepper'].release()
+            tracker.stop_tracking()
+            if not move.done():
+                move.set_result(not self._stepper_stopped[motor])
+            self._release_stepper_driver(motor)  # once the move is done, else the driver is kept enabled
+
+        self.locks['stepper'].acquire()
+        starts = np.concatenate(([self.estimate_stepper_position(motor)], positions[:-1]))
+        durations = [TrapezoidalProfile(*segment).duration
+                     for segment in zip(starts, positions, max_speeds, accelerations)]
+        previous = self._stepper_moves.get(motor)
+        self._stepper_moves[motor] = move
+        if previous is not None and not previous.done():
+            previous.set_result(False)
+        self._stepper_stopped[motor] = False
+        self._enable_stepper_driver(motor)
+        tracker.start_tracking()  # before running, a short move may complete at once
+        run_segment(0)
+        self.locks['stepper'].release()
+        return move
+
+    def start_coordinated_move(self, positions: Dict[int, float], max_speed=200, acceleration=400) -> Future:
+        """ Start moving several stepper motors together and return immediately
+
+        :param positions: the target position of each motor, keyed by motor id
+        :param max_speed: the maximum speed of all the motors or a mapping of the speed of each motor
+        :param acceleration: the acceleration of all the motors or a mapping of the acceleration of each motor
+        :return: a Future whose result is True when all the motors have reached their target, False if one of
+            them has been stopped
+        """
+        coordinated_move = Future()
+        self.locks['stepper'].acquire()  # all the moves are sent back to back
+        moves = [self.start_stepper_move(position,
+                                         max_speed[motor] if isinstance(max_speed, dict) else max_speed,
+                                         acceleration[motor] if isinstance(acceleration, dict) else acceleration,
+                                         motor=motor)
+                 for motor, position in positions.items()]
+        self.locks['stepper'].release()
+
+        def move_done(_):
+            if all(move.done() for move in moves) and not coordinated_move.done():
+                coordinated_move.set_result(all(move.result() for move in moves))
+        if len(moves) == 0:
+            coordinated_move.set_result(True)
+        for move in moves:
+            move.add_done_callback(move_done)
+        return coordinated_move
+
+    def move_stepper_to_position(self, position: float, max_speed=200, acceleration=400, motor: int = None):
+        """ Move the stepper motor to the specified position and wait for the end of the motion """
+        return self.start_stepper_move(position, max_speed, acceleration, motor=motor).result()
+
+    def stop_stepper(self, motor: int = None) -> Future:
+        """ Stop the stepper motor as quickly as possible (using its acceleration)
+
+        The board sends no completion report for a stopped move, so its Future is resolved here (with False),
+        the queued segments are dropped, the position tracking is stopped and the enable policy is applied.
+
+        :return: the Future of the last move, already resolved
+        """
+        if motor is None:
+            motor = self.stepper_motor
+        self.locks['stepper'].acquire()
+        self._stepper_stopped[motor] = True
+        self.stepper_stop(motor)
+        move = self._stepper_moves.pop(motor, None)  # a late completion callback will find no move to chain
+        if move is None:
+            move = Future()
+        if not move.done():
+            move.set_result(False)
+        self._stepper_pending_durations[motor] = 0.
+        self.stepper_trackers[motor].stop_tracking()  # requests the final position
+        self._release_stepper_driver(motor)
+        self.locks['stepper'].release()
+        return move
+
+    def estimate_stepper_position(self, motor: int = None) -> float:
+        """ Estimate the current position of the stepper motor without asking the board
+
+        While the motor is moving, the position is computed from the trapezoidal profile of the current move. Once
+        the target is reached, it is the target. If the move has been stopped (or if the motor never moved), it is
+        the last position received from the board.
+        """
+        if motor is None:
+            motor = self.stepper_motor
+        profile = self.stepper_profiles.get(motor)
+        if profile is None or self._stepper_stopped[motor]:
+            return self.stepper_trackers[motor].position
+        if self.is_stepper_moving(motor):
+            return profile.position_at()
+        return profile.target
+
+    def estimate_stepper_completion(self, motor: int = None) -> Optional[float]:
+        """ Estimate the time (as returned by time.time) the current move (or queue) of the motor will end
+
+        Returns None if the motor is not moving
+        """
+        if motor is None:
+            motor = self.stepper_motor
+        if not self.is_stepper_moving(motor):
+            return None
+        return self.stepper_profiles[motor].estimated_completion + self._stepper_pending_durations[motor]
+
+    def get_stepper_position(self, cached=False, timeout: float = None, motor: int = None):
+        """ Retrieve the current position of the stepper motor
+
+        If cached is True, return at once the last position received from the board, it is kept up to date
+        while the motor is moving. Otherwise request it from the board and wait for the answer.
+        """
+        tracker = self.stepper_trackers[self.stepper_motor if motor is None else motor]
+        if cached:
+            return tracker.position
+        return tracker.read(timeout)
+
+    def shutdown(self):
+        for timer in list(self._stepper_idle_timers.values()):
+            timer.cancel()
+        for tracker in self.stepper_trackers.values():
+            tracker.stop()
+        super().shutdown()
+
 
 if __name__ == '__main__':
     import time
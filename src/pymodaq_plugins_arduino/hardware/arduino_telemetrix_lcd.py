@@ -1,3 +1,7 @@
+from threading import Thread, Condition
+from time import perf_counter
+from typing import List, Optional
+
 from pymodaq_plugins_arduino.hardware.arduino_telemetrix import Arduino
 from pymodaq_plugins_arduino.hardware.lcd_i2c.lcd_i2c import LCD
 
@@ -5,6 +9,49 @@ from pymodaq_plugins_arduino.utils import Config
 config = Config()
 
 
+class LCDRefreshWorker(Thread):
+    """ Background thread rendering on the LCD the last published lines
+
+    Publishing is non-blocking and the latest lines always win: if several frames are published
+    while the LCD is being refreshed, only the last one is rendered. The refresh rate is limited to
+    max_rate (in Hz), intermediate frames are skipped.
+    """
+
+    def __init__(self, lcd: LCD, max_rate: float = 20.):
+        super().__init__(daemon=True)
+        self._lcd = lcd
+        self._min_period = 1 / max_rate if max_rate > 0 else 0.
+        self._condition = Condition()
+        self._lines: Optional[List[str]] = None
+        self._running = True
+
+    def publish(self, lines: List[str]):
+        """ Set the lines to be displayed at the next refresh, replacing the pending ones"""
+        with self._condition:
+            self._lines = list(lines)
+            self._condition.notify()
+
+    def stop(self, timeout: float = 1.):
+        """ Stop the thread, pending lines are dropped"""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self.join(timeout)
+
+    def run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._lines is not None or not self._running)
+                if not self._running:
+                    break
+                lines, self._lines = self._lines, None
+            start = perf_counter()
+            self._lcd.render(lines)
+            with self._condition:
+                self._condition.wait_for(lambda: not self._running,
+                                         self._min_period - (perf_counter() - start))
+
+
 class ArduinoLCD(Arduino):
 
     def __init__(self, *args, **kwargs):
@@ -14,6 +61,7 @@ class ArduinoLCD(Arduino):
                        cols=config('LCD', 'cols'),
                        rows=config('LCD', 'rows'),
                        i2c=self)
+        self.lcd_worker: Optional[LCDRefreshWorker] = None
 
         self._is_init: bool = False
 
@@ -21,10 +69,22 @@ class ArduinoLCD(Arduino):
         self.lcd.begin()
         self.lcd.display()
         self.lcd.backlight()
+        self.lcd_worker = LCDRefreshWorker(self.lcd, config('LCD', 'max_refresh_rate'))
+        self.lcd_worker.start()
         self._is_init = True
 
+    @property
+    def is_lcd_init(self) -> bool:
+        return self._is_init
+
+    def publish_lines(self, lines: List[str]):
+        """ Ask the LCD worker to display these lines, returns immediately"""
+        if self.lcd_worker is not None:
+            self.lcd_worker.publish(lines)
+
     def shutdown(self):
         if self._is_init:
+            self.lcd_worker.stop()
             self.lcd.no_backlight()
             self.lcd.clear()
         super().shutdown()
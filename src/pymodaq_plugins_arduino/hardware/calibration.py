@@ -0,0 +1,93 @@
+from typing import Sequence, Union
+
+import numpy as np
+
+PWM_MAX = 255
+calibration_modes = ('none', 'gamma', 'table')
+
+
+class CalibrationLUT:
+    """ Precomputed lookup tables between a linear level and the PWM value of an output
+
+    The levels have the same range as the PWM values (0-255) so that a linear scan of the level gives a linear
+    scan of the perceived brightness (gamma curve) or of the measured optical power (table). Both directions are
+    computed once and applied by indexing numpy arrays, for a single value or for a whole scan at once.
+
+    Parameters
+    ----------
+    pwm_values: Sequence of float
+        The (non rounded) PWM value of each of the 256 levels, non decreasing
+    """
+
+    def __init__(self, pwm_values: Sequence[float]):
+        pwm_values = np.clip(np.asarray(pwm_values, dtype=float), 0, PWM_MAX)
+        if pwm_values.shape != (PWM_MAX + 1,):
+            raise ValueError(f'The calibration should give the PWM value of each of the {PWM_MAX + 1} levels')
+        if np.any(np.diff(pwm_values) < 0):
+            raise ValueError('The calibration should be non decreasing')
+        levels = np.arange(PWM_MAX + 1, dtype=float)
+        self._pwm = np.round(pwm_values).astype(int)
+        self._levels = np.interp(levels, pwm_values, levels)  # level of each PWM value
+
+    @classmethod
+    def identity(cls) -> 'CalibrationLUT':
+        return cls(np.arange(PWM_MAX + 1))
+
+    @classmethod
+    def from_gamma(cls, gamma: float) -> 'CalibrationLUT':
+        """ Perceived brightness correction: pwm = 255 * (level / 255) ** gamma"""
+        if gamma <= 0:
+            raise ValueError('gamma should be positive')
+        return cls(PWM_MAX * (np.arange(PWM_MAX + 1) / PWM_MAX) ** gamma)
+
+    @classmethod
+    def from_table(cls, pwm: Sequence[float], power: Sequence[float]) -> 'CalibrationLUT':
+        """ Linear power correction from a measured table
+
+        Parameters
+        ----------
+        pwm: Sequence of float
+            The PWM values of the measurement points, increasing
+        power: Sequence of float
+            The measured optical power (any unit) at these PWM values, increasing. The level 255 corresponds
+            to the largest measured power
+        """
+        pwm = np.asarray(pwm, dtype=float)
+        power = np.asarray(power, dtype=float)
+        if pwm.shape != power.shape or pwm.size < 2:
+            raise ValueError('The calibration table should have at least two (pwm, power) points')
+        if np.any(np.diff(pwm) <= 0) or np.any(np.diff(power) <= 0):
+            raise ValueError('The pwm and power values of the calibration table should be increasing')
+        power_levels = (power - power[0]) / (power[-1] - power[0]) * PWM_MAX
+        return cls(np.interp(np.arange(PWM_MAX + 1), power_levels, pwm))
+
+    def to_pwm(self, level: Union[float, np.ndarray]) -> Union[int, np.ndarray]:
+        """ The PWM value(s) to write for the given level(s), rounded and clipped to 0-255"""
+        pwm = self._pwm[np.clip(np.round(level), 0, PWM_MAX).astype(int)]
+        return int(pwm) if np.ndim(pwm) == 0 else pwm
+
+    def to_level(self, pwm: Union[int, np.ndarray]) -> Union[float, np.ndarray]:
+        """ The level(s) corresponding to the given PWM value(s)"""
+        level = self._levels[np.clip(np.round(pwm), 0, PWM_MAX).astype(int)]
+        return float(level) if np.ndim(level) == 0 else level
+
+
+def calibration_from_config(calibration: dict, channel: str) -> CalibrationLUT:
+    """ Build the calibration of a channel from the calibration section of the config file
+
+    Parameters
+    ----------
+    calibration: dict
+        with a mode key ('none', 'gamma' or 'table'), a gamma key for the gamma mode and, for the table mode,
+        a sub table per channel with pwm and power arrays
+    channel: str
+        The name of the channel, for instance Red
+    """
+    mode = calibration.get('mode', 'none')
+    if mode == 'none':
+        return CalibrationLUT.identity()
+    elif mode == 'gamma':
+        return CalibrationLUT.from_gamma(calibration['gamma'])
+    elif mode == 'table':
+        return CalibrationLUT.from_table(calibration[channel]['pwm'], calibration[channel]['power'])
+    raise ValueError(f'Unknown calibration mode {mode}, should be one of {calibration_modes}')
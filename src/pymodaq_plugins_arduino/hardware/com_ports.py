@@ -0,0 +1,80 @@
+from threading import Lock
+from time import perf_counter
+from typing import List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pymodaq.utils.parameter import Parameter
+
+COM_PORTS_TTL = 30.  # seconds during which a port discovery is reused
+
+_lock = Lock()
+_com_ports: List[str] = []
+_discovery_time: Optional[float] = None
+
+
+def list_serial_ports() -> List[str]:
+    """ Enumerate the serial ports using pyserial (already a dependency of telemetrix)"""
+    from serial.tools import list_ports
+    return sorted(port.device for port in list_ports.comports())
+
+
+def list_visa_ports() -> List[str]:
+    """ Enumerate the ports known by the VISA backend, using their alias if any"""
+    from pyvisa import ResourceManager
+    com_ports = []
+    for name, rinfo in ResourceManager().list_resources_info().items():
+        if rinfo.alias is not None:
+            com_ports.append(rinfo.alias)
+        else:
+            com_ports.append(name)
+    return com_ports
+
+
+def get_com_ports(refresh: bool = False, ttl: float = COM_PORTS_TTL, use_visa: bool = False) -> List[str]:
+    """ Get the available COM ports
+
+    The discovery is only done on the first call, then its result is cached for ttl seconds
+
+    Parameters
+    ----------
+    refresh: bool
+        if True, force a new discovery
+    ttl: float
+        the validity, in seconds, of a previous discovery
+    use_visa: bool
+        if True, enumerate the ports with the VISA backend (slower) instead of pyserial
+    """
+    global _com_ports, _discovery_time
+    with _lock:
+        if refresh or use_visa or _discovery_time is None or perf_counter() - _discovery_time > ttl:
+            _com_ports = list_visa_ports() if use_visa else list_serial_ports()
+            _discovery_time = perf_counter()
+        return list(_com_ports)
+
+
+def com_port_limits(com_port: str, refresh: bool = False) -> List[str]:
+    """ The available ports, com_port being added if not found (for instance a board not connected yet)"""
+    com_ports = get_com_ports(refresh)
+    if com_port not in com_ports:
+        com_ports.append(com_port)
+    return com_ports
+
+
+def update_com_port_limits(param: 'Parameter', refresh: bool = False):
+    """ Fill the limits of a COM port list parameter with the available ports, keeping its current value"""
+    param.setLimits(com_port_limits(param.value(), refresh))
+
+
+class PluginParams:
+    """ Class attribute holding the parameters of a plugin, whose com_port parameter lists the available ports
+
+    The ports are discovered (cached pyserial enumeration) when the parameters are read, that is when the plugin is
+    selected in the DAQ_Move or DAQ_Viewer UI or instantiated, never when the plugin module is imported for the
+    plugin discovery.
+    """
+    def __init__(self, params: List[dict]):
+        self.params = params
+
+    def __get__(self, instance, owner) -> List[dict]:
+        return [dict(param, limits=com_port_limits(param['value'])) if param.get('name') == 'com_port' else param
+                for param in self.params]
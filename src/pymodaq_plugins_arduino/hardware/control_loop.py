@@ -0,0 +1,113 @@
+from time import perf_counter
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from pymodaq_plugins_arduino.hardware.analog_buffer import AnalogRingBuffer
+
+
+class ControlLoop:
+    """ PID controller meant to be run directly in the callback of an analog input
+
+    Each call to update (one per analog report) computes the output from the new sample and writes it, so the
+    loop runs at the analog report rate without any thread switch. The setpoint and the gains can be changed at
+    any time from another thread. The integral term is clamped to the output limits (anti-windup) and the
+    derivative term is computed on the measurement to avoid kicks when the setpoint changes.
+
+    The time of each iteration and its latency (computation and write of the output) are recorded in a ring buffer
+    to check the loop timing. The times are the timestamps of the analog reports, i.e. the host time.time() at which
+    the Telemetrix reader thread received them (not a board clock), so the periods include the USB and thread jitter.
+
+    Parameters
+    ----------
+    write: Callable
+        Called with the new output at each iteration, for instance writing a PWM pin
+    setpoint: float
+        The target value of the input
+    kp, ki, kd: float
+        The proportional, integral (per second) and derivative (in seconds) gains
+    output_limits: tuple of float
+        The minimum and maximum output
+    stats_size: int
+        The number of iterations whose timing is kept in memory
+    """
+
+    def __init__(self, write: Callable[[float], None], setpoint: float = 0., kp: float = 1., ki: float = 0.,
+                 kd: float = 0., output_limits: Tuple[float, float] = (0., 255.), stats_size: int = 10000):
+        self._write = write
+        self.setpoint = setpoint
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.output_limits = output_limits
+        self.timing = AnalogRingBuffer(stats_size)  # timestamps of the iterations and their latency
+        self.output: Optional[float] = None
+        self._integral = 0.
+        self._last_timestamp: Optional[float] = None
+        self._last_value: Optional[float] = None
+
+    def set_gains(self, kp: float = None, ki: float = None, kd: float = None):
+        """ Change some of the gains, the other ones are kept"""
+        if kp is not None:
+            self.kp = kp
+        if ki is not None:
+            self.ki = ki
+        if kd is not None:
+            self.kd = kd
+
+    def reset(self, output: float = None):
+        """ Restart the loop (bumpless from output if given) and forget the timing statistics"""
+        low, high = self.output_limits
+        self._integral = 0. if output is None else min(max(output, low), high)
+        self._last_timestamp = None
+        self._last_value = None
+        self.timing.clear()
+
+    def update(self, timestamp: float, value: float) -> float:
+        """ Compute and write the output from a new sample of the input
+
+        Parameters
+        ----------
+        timestamp: float
+            The time of the sample in seconds (host reception time of the report)
+        value: float
+            The value of the sample
+
+        Returns
+        -------
+        float: the new output
+        """
+        start = perf_counter()
+        low, high = self.output_limits
+        error = self.setpoint - value
+        derivative = 0.
+        if self._last_timestamp is not None:
+            dt = timestamp - self._last_timestamp
+            if dt > 0:
+                self._integral = min(max(self._integral + self.ki * error * dt, low), high)
+                derivative = -self.kd * (value - self._last_value) / dt
+        self._last_timestamp = timestamp
+        self._last_value = value
+
+        self.output = min(max(self.kp * error + self._integral + derivative, low), high)
+        self._write(self.output)
+        self.timing.append(timestamp, perf_counter() - start)
+        return self.output
+
+    def get_stats(self) -> Dict[str, float]:
+        """ Timing statistics of the iterations kept in memory
+
+        Returns
+        -------
+        dict: with the number of iterations, the mean rate (Hz), the mean and max period and the mean and max
+            latency (s)
+        """
+        timestamps, latencies = self.timing.read_last(self.timing.size)
+        periods = np.diff(timestamps)
+        stats = dict(iterations=self.timing.count,
+                     rate=1 / np.mean(periods) if len(periods) > 0 and np.mean(periods) > 0 else 0.,
+                     period_mean=float(np.mean(periods)) if len(periods) > 0 else 0.,
+                     period_max=float(np.max(periods)) if len(periods) > 0 else 0.,
+                     latency_mean=float(np.mean(latencies)) if len(latencies) > 0 else 0.,
+                     latency_max=float(np.max(latencies)) if len(latencies) > 0 else 0.)
+        return stats
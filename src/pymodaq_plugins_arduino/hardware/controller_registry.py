@@ -0,0 +1,111 @@
+from collections import defaultdict
+from importlib import import_module
+from threading import Lock
+from typing import Dict, Type, TypeVar
+
+ControllerType = TypeVar('ControllerType')
+
+controller_modules = {'Arduino': 'pymodaq_plugins_arduino.hardware.arduino_telemetrix',
+                      'LED_LCD': 'pymodaq_plugins_arduino.hardware.led_lcd'}
+
+
+class ControllerRegistry:
+    """ Process-wide, reference counted, registry of the boards keyed by their COM port
+
+    Every plugin asking for the same COM port gets the same controller instance, so the serial
+    connection (and the board reset/handshake delay) is paid only once. The controller is shut down
+    when the last plugin using it releases it.
+
+    The controller is created with the class of the first plugin opening the port, and an opened
+    controller can only be shared with plugins asking for one of its base classes. Opening the plugins
+    in a preset is therefore order dependent when their classes differ: the plugin with the most
+    derived class (for instance LEDwithLCD, using LED_LCD, before the Arduino based ones) has to be
+    initialized first.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._port_locks: Dict[str, Lock] = defaultdict(Lock)
+        self._controllers: Dict[str, object] = {}
+        self._counts: Dict[str, int] = {}
+
+    def acquire(self, com_port: str, controller_class: Type[ControllerType], **kwargs) -> ControllerType:
+        """ Get the controller connected to com_port, creating it if needed
+
+        Parameters
+        ----------
+        com_port: str
+            The port the board is connected to
+        controller_class: type
+            The class of the controller (Arduino or one of its subclasses). An already opened
+            controller is reused only if it is an instance of this class
+        kwargs: dict
+            extra arguments passed to the controller class when it is created
+        """
+        with self._lock:
+            port_lock = self._port_locks[com_port]
+        with port_lock:  # a board connection can take seconds, only block the plugins of this port
+            controller = self._controllers.get(com_port)
+            if controller is None:
+                controller = controller_class(com_port=com_port, **kwargs)
+                with self._lock:
+                    self._controllers[com_port] = controller
+                    self._counts[com_port] = 0
+            elif not isinstance(controller, controller_class):
+                raise TypeError(f'The board on {com_port} is already opened as a '
+                                f'{type(controller).__name__}, not as a {controller_class.__name__}: '
+                                f'initialize the plugin using {controller_class.__name__} first, before the '
+                                f'ones using {type(controller).__name__}')
+            with self._lock:
+                self._counts[com_port] += 1
+        return controller
+
+    def release(self, controller) -> bool:
+        """ Release a controller obtained from acquire, shutting it down if not used anymore
+
+        A controller that has not been obtained from acquire is left untouched
+
+        Returns
+        -------
+        bool: True if the controller has been shut down
+        """
+        with self._lock:
+            com_port = None
+            for port, registered in self._controllers.items():
+                if registered is controller:
+                    com_port = port
+                    break
+            if com_port is None:
+                return False
+            self._counts[com_port] -= 1
+            if self._counts[com_port] > 0:
+                return False
+            self._controllers.pop(com_port)
+            self._counts.pop(com_port)
+        controller.shutdown()
+        return True
+
+    def count(self, com_port: str) -> int:
+        """ Number of users of the controller connected to com_port"""
+        with self._lock:
+            return self._counts.get(com_port, 0)
+
+
+controller_registry = ControllerRegistry()
+
+
+def acquire_controller(com_port: str, class_name: str = 'Arduino', **kwargs):
+    """ Get the shared controller of a board for a plugin, see ControllerRegistry.acquire
+
+    The controller class (and telemetrix) is only imported here, when a plugin is initialized, never when the plugin
+    modules are imported for the plugin discovery.
+
+    Parameters
+    ----------
+    com_port: str
+        The port the board is connected to
+    class_name: str
+        The name of the controller class, one of controller_modules
+    """
+    controller_class = getattr(import_module(controller_modules[class_name]), class_name)
+    return controller_registry.acquire(com_port, controller_class, **kwargs)
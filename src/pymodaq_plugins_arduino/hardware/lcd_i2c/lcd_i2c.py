@@ -24,6 +24,14 @@ from pymodaq_plugins_arduino.hardware.lcd_i2c import const as Const
 from typing import List, Optional, Tuple, Union
 
 
+# telemetrix4arduino commands are limited to 30 bytes, an i2c write uses 5 of them plus the
+# data. 24 bytes are exactly 4 LCD commands
+I2C_MAX_WRITE_BYTES = 24
+
+# DDRAM address of the first column of each row
+ROW_OFFSETS: List[int] = [0x00, 0x40, 0x14, 0x54]
+
+
 def sleep_ms(duration_ms):
     return sleep(duration_ms / 1000)
 
@@ -70,6 +78,8 @@ class LCD:
         self._display_mode: int = 0
         self._display_function: int = 0
         self._cursor_position: Tuple[int, int] = (0, 0)  # (x, y)
+        # host side copy of the displayed characters
+        self._framebuffer: List[List[str]] = [[' '] * cols for _ in range(rows)]
 
     @property
     def addr(self) -> int:
@@ -121,6 +131,16 @@ class LCD:
         """
         return self._backlightval
 
+    @property
+    def framebuffer(self) -> List[str]:
+        """
+        Get the characters currently displayed, as known from the host
+
+        :returns:   One string per row
+        :rtype:     List[str]
+        """
+        return [''.join(row) for row in self._framebuffer]
+
     @property
     def cursor_position(self) -> Tuple[int, int]:
         """
@@ -211,6 +231,7 @@ class LCD:
         self._command(value=Const.LCD_CLEARDISPLAY)
         sleep_ms(2)     # this command takes a long time!
         self._cursor_position = (0, 0)   # (x, y)
+        self._framebuffer = [[' '] * self.cols for _ in range(self.rows)]
 
     def home(self) -> None:
         """
@@ -315,14 +336,12 @@ class LCD:
         :param      row:  The new row of the cursor
         :type       row:  int
         """
-        row_offsets: List[int] = [0x00, 0x40, 0x14, 0x54]
-
         # we count rows starting w/0
         if row > (self.rows - 1):
             row = self.rows - 1
 
         self._command(
-            value=(Const.LCD_SETDDRAMADDR | (col + row_offsets[row]))
+            value=(Const.LCD_SETDDRAMADDR | (col + ROW_OFFSETS[row]))
         )
 
         self._cursor_position = (col, row)   # (x, y)
@@ -408,15 +427,76 @@ class LCD:
         """
         Print text on LCD
 
+        All the characters are sent as a few multi-bytes I2C writes
+
         :param      test: Text to show on the LCD
         :type       text: str
         """
         _cursor_x, _cursor_y = self.cursor_position
 
+        data: List[int] = []
         for char in text:
-            self._command(value=ord(char), mode=Const.RS)
-
-        self.cursor_position = (_cursor_x + len(text), _cursor_y)
+            data.extend(self._command_bytes(value=ord(char), mode=Const.RS))
+        self._write_bytes(data)
+
+        row = self._framebuffer[_cursor_y]
+        for ind, char in enumerate(text[:max(0, self.cols - _cursor_x)]):
+            row[_cursor_x + ind] = char
+
+        # the LCD increments its address counter by itself, no need to send it
+        self._cursor_position = (_cursor_x + len(text), _cursor_y)
+
+    def render(self, lines: List[str]) -> None:
+        """
+        Display the given lines, only sending the characters that changed
+
+        The lines are compared to the framebuffer (the content currently
+        displayed) and only the runs of changed characters are printed. The
+        cursor is moved only when the next run does not start where the
+        previous one ended. Lines are truncated or padded with spaces to the
+        number of columns.
+
+        :param      lines:  The text of each row, starting from the first one
+        :type       lines:  List[str]
+        """
+        cursor_x, cursor_y = self.cursor_position
+        data: List[int] = []
+        for row, line in enumerate(lines[:self.rows]):
+            line = line[:self.cols].ljust(self.cols)
+            for start, stop in self._changed_runs(row, line):
+                if (start, row) != (cursor_x, cursor_y):
+                    data.extend(self._command_bytes(
+                        value=(Const.LCD_SETDDRAMADDR | (start + ROW_OFFSETS[row]))))
+                for char in line[start:stop]:
+                    data.extend(self._command_bytes(value=ord(char), mode=Const.RS))
+                self._framebuffer[row][start:stop] = line[start:stop]
+                cursor_x, cursor_y = stop, row
+        self._write_bytes(data)
+        self._cursor_position = (cursor_x, cursor_y)
+
+    def _changed_runs(self, row: int, line: str) -> List[Tuple[int, int]]:
+        """
+        Get the runs of characters of a row differing from the framebuffer
+
+        Two runs separated by a single unchanged character are merged, as
+        reprinting it costs the same as moving the cursor
+
+        :param      row:   The row index
+        :type       row:   int
+        :param      line:  The new content of the row (cols characters)
+        :type       line:  str
+        :returns:   The (start, stop) column indexes of each run
+        :rtype:     List[Tuple[int, int]]
+        """
+        runs: List[Tuple[int, int]] = []
+        for col, (old, new) in enumerate(zip(self._framebuffer[row], line)):
+            if old == new:
+                continue
+            if runs and col - runs[-1][1] <= 1:
+                runs[-1] = (runs[-1][0], col + 1)
+            else:
+                runs.append((col, col + 1))
+        return runs
 
     def _command(self, value: int, mode: int = 0) -> None:
         """
@@ -425,10 +505,40 @@ class LCD:
         :param      value:  The value
         :type       value:  int
         """
-        high_nib = value & 0xF0
-        low_nib = (value << 4) & 0xF0
-        self._write_4_bits(value=(high_nib | mode))
-        self._write_4_bits(value=(low_nib | mode))
+        self._write_bytes(self._command_bytes(value=value, mode=mode))
+
+    def _command_bytes(self, value: int, mode: int = 0) -> List[int]:
+        """
+        Get the expander bytes corresponding to a 8 bits command
+
+        Each nibble is written then latched by pulsing the Enable (EN) pin.
+        The I2C transfer of each byte (~90us at 100kHz) is longer than the
+        required EN pulse width (>450ns) and settling time (>37us)
+
+        :param      value:  The value
+        :type       value:  int
+        :returns:   The bytes to send to the expander
+        :rtype:     List[int]
+        """
+        data: List[int] = []
+        for nibble in (value & 0xF0, (value << 4) & 0xF0):
+            nibble |= mode
+            data.extend([nibble | self._backlightval,
+                         nibble | Const.EN | self._backlightval,
+                         (nibble & ~Const.EN) | self._backlightval])
+        return data
+
+    def _write_bytes(self, data: List[int]) -> None:
+        """
+        Write a sequence of bytes to the I2C device (port expander)
+
+        The sequence is split in chunks of at most I2C_MAX_WRITE_BYTES bytes
+
+        :param      data:  The bytes to send
+        :type       data:  List[int]
+        """
+        for ind in range(0, len(data), I2C_MAX_WRITE_BYTES):
+            self._i2c.writeto(self.addr, bytes(data[ind:ind + I2C_MAX_WRITE_BYTES]))
 
     def _write_4_bits(self, value: int) -> None:
         """
@@ -1,17 +1,13 @@
-import time
+from typing import Dict, Optional
 
 from pymodaq_plugins_arduino.hardware.arduino_telemetrix_lcd import ArduinoLCD
 
 from pymodaq_plugins_arduino.utils import Config
 
-from threading import Lock
-
 config = Config()
 
 lcd_header = 'RED  GREEN  BLUE'
 
-lock = Lock()
-
 
 def lcd_string(red: int, green: int, blue: int):
     return f'{red:03.0f}   {green:03.0f}    {blue:03.0f}'
@@ -19,19 +15,38 @@ def lcd_string(red: int, green: int, blue: int):
 
 class LED_LCD(ArduinoLCD):
 
+    def __init__(self, *args, **kwargs):
+        self.pin_levels: Dict[int, float] = {}  # displayed value of each pin, its PWM value if written without level
+        super().__init__(*args, **kwargs)
+
     def ini_lcd(self):
         super().ini_lcd()
         self.lcd.clear()
-        self.lcd.print(lcd_header)
+        self.publish_lines([lcd_header])
+
+    def publish_colors(self):
+        string = lcd_string(self.pin_levels.get(config('LED', 'pins', 'red_pin'), 0),
+                            self.pin_levels.get(config('LED', 'pins', 'green_pin'), 0),
+                            self.pin_levels.get(config('LED', 'pins', 'blue_pin'), 0),
+                            )
+        self.publish_lines([lcd_header, string])  # the LCD is refreshed in the background
 
     def analog_write_and_memorize(self, pin, value):
-        lock.acquire()
+        self.locks['pwm'].acquire()
         super().analog_write_and_memorize(pin, value)
-        self.lcd.set_cursor(0, 1)
-        string = lcd_string(self.pin_values_output.get(config('LED', 'pins', 'red_pin'), 0),
-                            self.pin_values_output.get(config('LED', 'pins', 'green_pin'), 0),
-                            self.pin_values_output.get(config('LED', 'pins', 'blue_pin'), 0),
-                            )
-        self.lcd.print(string)
-        time.sleep(0.003)
-        lock.release()
+        self.pin_levels[pin] = self.pin_values_output[pin]
+        self.publish_colors()
+        self.locks['pwm'].release()
+
+    def write_pins(self, values, levels: Optional[Dict[int, float]] = None):
+        """ Write several PWM outputs at once, see Arduino.write_pins
+
+        :param levels: the values displayed on the LCD, keyed by pin number (for instance the levels set by the
+            user before their calibration into PWM values). The PWM values are displayed for the other pins
+        """
+        levels = {} if levels is None else levels
+        self.locks['pwm'].acquire()
+        super().write_pins(values)
+        self.pin_levels.update({pin: levels.get(pin, self.pin_values_output[pin]) for pin in values})
+        self.publish_colors()  # a single display for all the channels
+        self.locks['pwm'].release()
@@ -0,0 +1,83 @@
+from time import time
+from typing import Optional, Union
+
+import numpy as np
+
+
+class TrapezoidalProfile:
+    """ Position versus time of a stepper move, as generated by the AccelStepper library
+
+    The motor starts at rest, accelerates up to max_speed, runs at constant speed then decelerates to
+    stop on the target. If the move is too short to reach max_speed, the profile is triangular.
+
+    Parameters
+    ----------
+    start: float
+        The position at the start of the move in steps
+    target: float
+        The target position in steps
+    max_speed: float
+        The maximum speed in steps per second
+    acceleration: float
+        The acceleration (and deceleration) in steps per second squared
+    start_time: float or None
+        The time (as returned by time.time) the move started, now if None
+    """
+
+    def __init__(self, start: float, target: float, max_speed: float, acceleration: float,
+                 start_time: Optional[float] = None):
+        if max_speed <= 0 or acceleration <= 0:
+            raise ValueError('The speed and the acceleration should be positive')
+        self.start = start
+        self.target = target
+        self.max_speed = max_speed
+        self.acceleration = acceleration
+        self.start_time = time() if start_time is None else start_time
+
+        distance = abs(target - start)
+        if max_speed ** 2 / acceleration >= distance:  # triangular profile
+            self.peak_speed = np.sqrt(distance * acceleration)
+        else:
+            self.peak_speed = max_speed
+        self.acceleration_time = self.peak_speed / acceleration
+        acceleration_distance = self.peak_speed ** 2 / (2 * acceleration)
+        self.cruise_time = (distance - 2 * acceleration_distance) / self.peak_speed if distance > 0 else 0.
+        self._distance = distance
+
+    @property
+    def duration(self) -> float:
+        """ The duration of the move in seconds"""
+        return 2 * self.acceleration_time + self.cruise_time
+
+    @property
+    def estimated_completion(self) -> float:
+        """ The time (as returned by time.time) the move should end"""
+        return self.start_time + self.duration
+
+    def position(self, elapsed: Union[float, np.ndarray]) -> Union[float, np.ndarray]:
+        """ The position after some time since the start of the move
+
+        Parameters
+        ----------
+        elapsed: float or ndarray
+            Time(s) in seconds since the start of the move, clipped to the duration of the move
+        """
+        elapsed = np.clip(elapsed, 0, self.duration)
+        a = self.acceleration
+        deceleration_start = self.acceleration_time + self.cruise_time
+        distance = np.where(
+            elapsed < self.acceleration_time,
+            a * elapsed ** 2 / 2,
+            np.where(elapsed < deceleration_start,
+                     self.peak_speed * (elapsed - self.acceleration_time / 2),
+                     self._distance - a * (self.duration - elapsed) ** 2 / 2))
+        position = self.start + np.sign(self.target - self.start) * distance
+        return float(position) if np.ndim(position) == 0 else position
+
+    def position_at(self, timestamp: Optional[float] = None) -> float:
+        """ The position at a given time (as returned by time.time), now if None"""
+        return self.position((time() if timestamp is None else timestamp) - self.start_time)
+
+    def remaining_time(self, timestamp: Optional[float] = None) -> float:
+        """ The time in seconds before the end of the move, from a given time or now"""
+        return max(0., self.estimated_completion - (time() if timestamp is None else timestamp))
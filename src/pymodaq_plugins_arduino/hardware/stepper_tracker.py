@@ -0,0 +1,122 @@
+from threading import Thread, Condition
+from time import perf_counter, time
+from typing import Optional
+
+
+class StepperPositionTracker(Thread):
+    """ Background thread caching the position of a stepper motor while it is moving
+
+    While tracking, the position is requested from the board at most rate times per second and
+    the reports (received on the Telemetrix reporting thread) update the cached position and its
+    timestamp. Reading the position is then a memory read instead of a serial round trip. When the
+    motor is idle, no request is sent.
+
+    Parameters
+    ----------
+    board: Telemetrix
+        The board driving the motor
+    motor_id: int
+        The id of the motor returned by set_pin_mode_stepper
+    rate: float
+        The maximum number of position requests per second while tracking
+    """
+
+    def __init__(self, board, motor_id: int, rate: float = 20.):
+        super().__init__(daemon=True)
+        self._board = board
+        self._motor_id = motor_id
+        self._min_period = 1 / rate if rate > 0 else 0.
+        self._condition = Condition()
+        self._position = 0
+        self._timestamp = time()
+        self._count = 0
+        self._tracking = False
+        self._running = True
+
+    @property
+    def position(self) -> int:
+        """ The last known position of the motor in steps"""
+        return self._position
+
+    @property
+    def timestamp(self) -> float:
+        """ The time (as returned by time.time) the last known position was received"""
+        return self._timestamp
+
+    @property
+    def count(self) -> int:
+        """ The number of positions received so far"""
+        return self._count
+
+    @property
+    def tracking(self) -> bool:
+        return self._tracking
+
+    def set_position(self, position: int):
+        """ Set the cached position, for instance after resetting the motor position"""
+        with self._condition:
+            self._position = position
+            self._timestamp = time()
+            self._condition.notify_all()
+
+    def update(self, data):
+        """ Callback of the position reports: [report type, motor id, position, timestamp]"""
+        with self._condition:
+            self._position = data[2]
+            self._timestamp = data[3]
+            self._count += 1
+            self._condition.notify_all()
+
+    def request(self):
+        """ Ask the board for the position without waiting for the answer"""
+        self._board.stepper_get_current_position(self._motor_id, current_position_callback=self.update)
+
+    def read(self, timeout: Optional[float] = None) -> Optional[int]:
+        """ Ask the board for the position and wait for the answer
+
+        Returns
+        -------
+        int: the position or None if the timeout elapsed
+        """
+        with self._condition:
+            count = self._count
+        self.request()
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._count > count, timeout):
+                return None
+            return self._position
+
+    def start_tracking(self):
+        """ Start polling the position, to be called when the motor starts moving"""
+        with self._condition:
+            self._tracking = True
+            self._condition.notify_all()
+
+    def stop_tracking(self):
+        """ Stop polling the position once the final one has been requested
+
+        To be called when the motor stops. It never waits for the board so it can be called from
+        the Telemetrix reporting thread
+        """
+        with self._condition:
+            self._tracking = False
+        self.request()
+
+    def stop(self, timeout: float = 1.):
+        """ Stop the thread"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self.join(timeout)
+
+    def run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._tracking or not self._running)
+                if not self._running:
+                    break
+            start = perf_counter()
+            self.request()
+            with self._condition:
+                self._condition.wait_for(lambda: not self._running,
+                                         self._min_period - (perf_counter() - start))
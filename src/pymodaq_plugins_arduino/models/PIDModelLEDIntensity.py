@@ -0,0 +1,136 @@
+from typing import List
+
+import numpy as np
+
+from pymodaq.extensions.pid.utils import PIDModelGeneric, main
+from pymodaq.utils.data import DataToExport, DataCalculated, DataActuator, DataToActuators
+
+PWM_MIN = 0
+PWM_MAX = 255
+
+
+def analog_values(measurements: DataToExport, detector: str) -> dict:
+    """ Get the last value of each analog channel grabbed by the Analog detector, keyed by channel name (AI0...)"""
+    values = {}
+    for dwa in measurements.get_data_from_dim('Data0D'):
+        if not str(dwa.origin).startswith(detector) or not dwa.name.startswith('AI'):
+            continue
+        data = np.concatenate([np.atleast_1d(array) for array in dwa.data])  # all the channels at once
+        for label, value in zip(dwa.labels, data):
+            channel, kind = label.split(' ')[:2]  # labels are like 'AI0 data ' or 'AI0 std '
+            if kind == 'data':
+                values[channel] = value
+    return values
+
+
+class PIDModelLEDIntensity(PIDModelGeneric):
+    """ Stabilize the intensity of the LED measured by a photodiode on an analog input
+
+    The Analog detector (DAQ_0DViewer_Analog) is set to streaming with fresh samples so that each iteration of the
+    loop waits for the next analog report: the loop rate is the analog scan rate (the PID sample time is set to
+    0). The PID output is a PWM value, applied to the LED channels weighted by the channel weights and clipped to
+    the 0-255 range.
+    """
+    limits = dict(max=dict(state=True, value=PWM_MAX),
+                  min=dict(state=True, value=PWM_MIN),)
+    konstants = dict(kp=0.05, ki=2., kd=0.)
+
+    Nsetpoints = 1  # number of setpoints
+    setpoint_ini = [512.]  # in the units of the analog input (ADC counts times the input scale)
+    setpoints_names = ['Intensity']  # number and names of setpoints
+
+    actuators_name = ['Red', 'Green', 'Blue']  # names of actuator's control modules involved in the PID
+    detectors_name = ['Analog']  # names of detector's control modules involved in the PID
+
+    params = [
+        {'title': 'Analog channel:', 'name': 'channel', 'type': 'list', 'value': 'AI0',
+         'limits': [f'AI{ind}' for ind in range(6)]},
+        {'title': 'Input scale:', 'name': 'scale', 'type': 'float', 'value': 1.,
+         'tip': 'Conversion factor from ADC counts to the setpoint units'},
+        {'title': 'Input offset:', 'name': 'offset', 'type': 'float', 'value': 0.,
+         'tip': 'Dark signal in ADC counts, subtracted before scaling'},
+        {'title': 'Channel weights:', 'name': 'weights', 'type': 'group', 'children': [
+            {'title': f'{name}:', 'name': name, 'type': 'float', 'value': 1., 'min': 0.}
+            for name in actuators_name]},
+    ]
+
+    def __init__(self, pid_controller):
+        super().__init__(pid_controller)
+        self.weights = np.ones((len(self.actuators_name),))
+
+    def update_settings(self, param):
+        """
+        Get a parameter instance whose value has been modified by a user on the UI
+        Parameters
+        ----------
+        param: (Parameter) instance of Parameter object
+        """
+        if param.parent().name() == 'weights':
+            self.update_weights()
+        elif param.name() == 'channel':
+            self.ini_detector()
+
+    def update_weights(self):
+        self.weights = np.array([self.settings['weights', name] for name in self.actuators_name])
+
+    def ini_model(self):
+        super().ini_model()
+        self.update_weights()
+        # no extra sleep in the loop, its rate is set by the analog reports
+        self.pid_controller.settings.child('main_settings', 'pid_controls', 'sample_time').setValue(0)
+        self.ini_detector()
+
+    def ini_detector(self):
+        """ Activate the channel on the Analog detector and wait for a new report at each grab"""
+        detector = self.modules_manager.get_mod_from_name(self.detectors_name[0], 'det')
+        if detector is None:
+            return
+        detector_settings = detector.settings.child('detector_settings')
+        detector_settings.child('streaming').setValue(True)
+        detector_settings.child('fresh_sample').setValue(True)
+        detector_settings.child(self.settings['channel'], 'ch').setValue(True)
+
+    def convert_input(self, measurements: DataToExport):
+        """
+        Convert the measurements in the units to be fed to the PID (same dimensionality as the setpoint)
+        Parameters
+        ----------
+        measurements: DataToExport
+            Data from the declared detectors from which the model extract a value of the same units as the setpoint
+
+        Returns
+        -------
+        DataToExport: the converted input in the setpoints units
+
+        """
+        values = analog_values(measurements, self.detectors_name[0])
+        value = (values[self.settings['channel']] - self.settings['offset']) * self.settings['scale']
+        self.curr_input = [value]
+        return DataToExport('inputs',
+                            data=[DataCalculated(self.setpoints_names[0], data=[np.array([value])])])
+
+    def convert_output(self, outputs: List[float], dt: float, stab=True):
+        """
+        Convert the output of the PID in units to be fed into the actuator
+        Parameters
+        ----------
+        outputs: List of float
+            output value from the PID, the PWM value of the LED
+        dt: float
+            Ellapsed time since the last call to this function
+        stab: bool
+
+        Returns
+        -------
+        DataToActuators: the PWM value of each LED channel
+
+        """
+        self.curr_output = outputs
+        pwm = np.clip(outputs[0] * self.weights, PWM_MIN, PWM_MAX)
+        return DataToActuators('pid', mode='abs',
+                               data=[DataActuator(name, data=float(value))
+                                     for name, value in zip(self.actuators_name, pwm)])
+
+
+if __name__ == '__main__':
+    main("ArduinoLED.xml")  # a preset with the Red, Green, Blue actuators and the Analog detector
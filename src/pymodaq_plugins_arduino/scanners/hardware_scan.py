@@ -0,0 +1,215 @@
+from concurrent.futures import Future, TimeoutError
+from threading import Event, Thread
+from time import time
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+axis_kinds = ('pwm', 'servo', 'stepper')
+
+
+def linear_trajectory(start: float, stop: float, npoints: int) -> np.ndarray:
+    """ The positions of a linear scan of one axis, as a (npoints, 1) array"""
+    if npoints < 1:
+        raise ValueError('A scan should have at least one point')
+    return np.linspace(start, stop, npoints)[:, np.newaxis]
+
+
+def grid_trajectory(*axes_positions: Sequence[float], snake: bool = False) -> np.ndarray:
+    """ The positions of a grid scan, the last axis being the fastest one
+
+    Parameters
+    ----------
+    axes_positions: Sequence of float
+        The positions of each axis
+    snake: bool
+        If True, every other line of the fast axis is scanned backward so that it never jumps back
+
+    Returns
+    -------
+    np.ndarray: the positions of all the axes at each point, shape (npoints, naxes)
+    """
+    if len(axes_positions) == 0:
+        raise ValueError('A grid scan should have at least one axis')
+    axes_positions = [np.asarray(positions, dtype=float) for positions in axes_positions]
+    grid = np.stack(np.meshgrid(*axes_positions, indexing='ij'), axis=-1)
+    if snake and len(axes_positions) > 1:
+        lines = grid.reshape((-1, len(axes_positions[-1]), len(axes_positions)))
+        lines[1::2] = lines[1::2, ::-1]
+        grid = lines
+    return grid.reshape((-1, len(axes_positions)))
+
+
+class HardwareScan:
+    """ Move-then-read scan of some actuators of the Arduino, executed from a single worker thread
+
+    The whole trajectory is given as a numpy array and run point by point without going through the dashboard:
+    at each point all the PWM axes are written in a single message (write_pins), the servo axes are moved and the
+    stepper axes are moved together, then the next samples of the analog pins are read from their ring buffers.
+    A sample is kept only if it has been received at least settle_time after the move, so that there is neither
+    a fixed sleep nor a request/answer round trip per point.
+
+    The streamed analog pins are reported at every board scan interval, so samples keep coming whether the input
+    changes or not. If no sample is received within timeout seconds (for instance if the reports stall), the values
+    of the point are NaN, it is counted in missed_points and the scan goes on. A stepper move not completed within
+    timeout seconds after its expected end aborts the scan with a TimeoutError.
+
+    Parameters
+    ----------
+    controller: Arduino
+        The controller driving the actuators and streaming the analog inputs
+    axes: list of tuple
+        The kind ('pwm', 'servo' or 'stepper') and the pin (or the stepper motor id) of each axis, in the order
+        of the columns of the trajectory
+    analog_pins: list of int
+        The analog pins read at each point
+    settle_time: float
+        The time in seconds between the end of a move and the first sample kept
+    averaging: int
+        The number of samples averaged at each point
+    timeout: float
+        The maximum time in seconds waiting for the samples of a point, or for the end of a stepper move after its
+        expected duration
+    scan_interval: int
+        The board analog scan interval in ms, used if an analog pin is not already streaming
+    max_speed, acceleration: float
+        The speed (steps/s) and acceleration (steps/s²) of the stepper moves
+    """
+
+    def __init__(self, controller, axes: Iterable[Tuple[str, int]], analog_pins: Iterable[int],
+                 settle_time: float = 0., averaging: int = 1, timeout: float = 1., scan_interval: int = 1,
+                 max_speed: float = 200, acceleration: float = 400):
+        self.controller = controller
+        self.axes: List[Tuple[str, int]] = list(axes)
+        for kind, _ in self.axes:
+            if kind not in axis_kinds:
+                raise ValueError(f'Unknown axis kind {kind}, should be one of {axis_kinds}')
+        self.analog_pins: List[int] = list(analog_pins)
+        if averaging < 1:
+            raise ValueError('At least one sample should be averaged at each point')
+        self.settle_time = settle_time
+        self.averaging = averaging
+        self.timeout = timeout
+        self.scan_interval = scan_interval
+        self.max_speed = max_speed
+        self.acceleration = acceleration
+        self.missed_points = 0
+        self._stop_event = Event()
+        self._thread: Optional[Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, trajectory: np.ndarray) -> Future:
+        """ Run the scan in a background thread and return immediately
+
+        Returns
+        -------
+        Future: whose result is the one of run, or the exception it raised
+        """
+        if self.running:
+            raise RuntimeError('A scan is already running')
+        scan = Future()
+
+        def worker():
+            try:
+                scan.set_result(self.run(trajectory))
+            except Exception as e:
+                scan.set_exception(e)
+
+        self._thread = Thread(target=worker, daemon=True)
+        self._thread.start()
+        return scan
+
+    def stop(self):
+        """ Stop the scan after the current point, the points not scanned keep NaN values"""
+        self._stop_event.set()
+
+    def run(self, trajectory: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """ Run the scan and wait for its end
+
+        Parameters
+        ----------
+        trajectory: np.ndarray
+            The positions of all the axes at each point, shape (npoints, naxes). PWM values are written as is
+            (apply a calibration beforehand with CalibrationLUT.to_pwm if needed)
+
+        Returns
+        -------
+        np.ndarray: the time (as returned by time.time) of the first sample of each point, shape (npoints,)
+        np.ndarray: the (averaged) value of each analog pin at each point, shape (npoints, len(analog_pins))
+        """
+        trajectory = np.atleast_2d(np.asarray(trajectory, dtype=float))
+        if trajectory.shape[1] != len(self.axes):
+            raise ValueError(f'The trajectory should have one column per axis ({len(self.axes)})')
+        timestamps = np.full((trajectory.shape[0],), np.nan)
+        values = np.full((trajectory.shape[0], len(self.analog_pins)), np.nan)
+        self.missed_points = 0
+        self._stop_event.clear()
+
+        started_pins = [pin for pin in self.analog_pins if pin not in self.controller.analog_streaming_pins]
+        for pin in started_pins:
+            self.controller.start_analog_streaming(pin, self.scan_interval)
+        try:
+            pwm_columns = [ind for ind, (kind, _) in enumerate(self.axes) if kind == 'pwm']
+            pwm_pins = [self.axes[ind][1] for ind in pwm_columns]
+            for ind_point, positions in enumerate(trajectory):
+                if self._stop_event.is_set():
+                    break
+                indexes = [self.controller.get_analog_buffer(pin).count for pin in self.analog_pins]
+                self._move(positions, pwm_columns, pwm_pins)
+                timestamps[ind_point], values[ind_point] = self._read(indexes, time() + self.settle_time)
+        finally:
+            for pin in started_pins:
+                self.controller.stop_analog_streaming(pin)
+        return timestamps, values
+
+    def _move(self, positions: np.ndarray, pwm_columns: List[int], pwm_pins: List[int]):
+        if len(pwm_pins) > 0:
+            self.controller.write_pins(dict(zip(pwm_pins, positions[pwm_columns])))
+        steppers = {}
+        for (kind, pin), position in zip(self.axes, positions):
+            if kind == 'servo':
+                self.controller.servo_move_degree(pin, position)
+            elif kind == 'stepper':
+                steppers[pin] = int(round(position))
+        if len(steppers) > 0:
+            move = self.controller.start_coordinated_move(steppers, self.max_speed, self.acceleration)
+            completions = [self.controller.estimate_stepper_completion(motor) for motor in steppers]
+            duration = max([completion - time() for completion in completions if completion is not None] + [0.])
+            try:
+                move.result(timeout=duration + self.timeout)
+            except TimeoutError:
+                for motor in steppers:
+                    self.controller.stop_stepper(motor)
+                raise TimeoutError(f'The stepper motors {list(steppers)} did not complete their move, '
+                                   f'the scan is aborted')
+
+    def _read(self, indexes: List[int], ready_time: float) -> Tuple[float, np.ndarray]:
+        """ The first timestamp and the averaged values of the samples received after ready_time"""
+        deadline = ready_time + self.timeout
+        first_timestamp = np.nan
+        values = np.zeros((len(self.analog_pins),))
+        missed = False
+        for ind_pin, (pin, index) in enumerate(zip(self.analog_pins, indexes)):
+            buffer = self.controller.get_analog_buffer(pin)
+            kept_timestamps = np.zeros((0,))
+            kept_values = np.zeros((0,))
+            while len(kept_values) < self.averaging:
+                if not buffer.wait_for(index + self.averaging - len(kept_values) - 1,
+                                       max(deadline - time(), 0.)):
+                    break
+                sample_timestamps, sample_values, index = buffer.read_since(index)
+                kept = sample_timestamps >= ready_time
+                kept_timestamps = np.concatenate((kept_timestamps, sample_timestamps[kept]))
+                kept_values = np.concatenate((kept_values, sample_values[kept]))
+            if len(kept_values) == 0:  # no stale value is returned
+                missed = True
+                values[ind_pin] = np.nan
+            else:
+                values[ind_pin] = np.mean(kept_values[:self.averaging])
+                first_timestamp = np.nanmin((first_timestamp, kept_timestamps[0]))
+        if missed:
+            self.missed_points += 1
+        return first_timestamp, values
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from pymodaq_plugins_arduino.hardware.analog_buffer import AnalogRingBuffer
+
+
+def fill(buffer: AnalogRingBuffer, n: int, start: int = 0):
+    for ind in range(start, start + n):
+        buffer.append(0.1 * ind, ind)
+
+
+def test_wrong_size():
+    with pytest.raises(ValueError):
+        AnalogRingBuffer(0)
+
+
+def test_read_since():
+    buffer = AnalogRingBuffer(10)
+    fill(buffer, 4)
+    timestamps, values, index = buffer.read_since(0)
+    assert index == 4
+    assert np.allclose(values, [0, 1, 2, 3])
+    assert np.allclose(timestamps, [0, 0.1, 0.2, 0.3])
+
+    fill(buffer, 3, start=4)
+    timestamps, values, index = buffer.read_since(index)
+    assert index == 7
+    assert np.allclose(values, [4, 5, 6])
+
+    timestamps, values, index = buffer.read_since(index)
+    assert index == 7
+    assert len(values) == 0
+
+
+def test_overwrite():
+    buffer = AnalogRingBuffer(5)
+    fill(buffer, 12)
+    assert buffer.count == 12
+    assert len(buffer) == 5
+    timestamps, values, index = buffer.read_since(0)
+    assert index == 12
+    assert np.allclose(values, [7, 8, 9, 10, 11])
+    assert np.allclose(timestamps, 0.1 * values)
+
+
+def test_read_last():
+    buffer = AnalogRingBuffer(5)
+    fill(buffer, 3)
+    assert np.allclose(buffer.read_last(2)[1], [1, 2])
+    assert np.allclose(buffer.read_last(10)[1], [0, 1, 2])
+    fill(buffer, 4, start=3)
+    assert np.allclose(buffer.read_last(10)[1], [2, 3, 4, 5, 6])
+    buffer.clear()
+    assert len(buffer.read_last(3)[1]) == 0
+
+
+def test_wait_for():
+    from threading import Timer
+    buffer = AnalogRingBuffer(5)
+    fill(buffer, 2)
+    assert buffer.wait_for(1, timeout=0)
+    assert not buffer.wait_for(2, timeout=0.01)
+
+    index = buffer.count
+    Timer(0.02, buffer.append, (1., 10)).start()
+    assert buffer.wait_for(index, timeout=1)
+    assert buffer.read_since(index)[1][0] == 10
@@ -0,0 +1,79 @@
+from time import sleep
+
+import numpy as np
+import pytest
+import tables
+
+from pymodaq_plugins_arduino.exporters.analog_stream import AnalogStreamExporter, read_binary
+from pymodaq_plugins_arduino.hardware.analog_buffer import AnalogRingBuffer
+
+
+def test_hdf5_blocks(tmp_path):
+    path = tmp_path / 'stream.h5'
+    exporter = AnalogStreamExporter(path, compression='zlib', chunk_size=64, period=0.01)
+    exporter.start()
+    for ind in range(10):
+        assert exporter.write('AI0', np.arange(100) + 100 * ind, np.full((100,), ind))
+    exporter.write('AI1', [0.5], [3])
+    exporter.stop()
+    assert exporter.written_samples == 1001
+
+    with tables.open_file(str(path)) as file:
+        timestamps = file.get_node('/AI0/timestamps')
+        assert timestamps.chunkshape == (64,)
+        assert timestamps.filters.complib == 'zlib'
+        assert timestamps.read() == pytest.approx(np.arange(1000))
+        assert file.get_node('/AI0/values').read() == pytest.approx(np.repeat(np.arange(10), 100))
+        assert file.get_node('/AI1/values').read() == pytest.approx([3])
+
+
+def test_binary_follow(tmp_path):
+    path = tmp_path / 'stream'
+    buffer = AnalogRingBuffer(50)
+    buffer.append(0., -1.)  # already in the buffer
+    exporter = AnalogStreamExporter(path, export_format='binary', period=0.01)
+    exporter.follow('AI0', buffer)
+    exporter.start()
+    for ind in range(200):
+        buffer.append(ind + 1., ind)
+        if ind % 20 == 0:
+            sleep(0.05)
+    exporter.stop()
+
+    timestamps, values = read_binary(path, 'AI0')
+    assert len(values) + exporter.lost_samples == 200
+    assert np.all(np.diff(timestamps) > 0)
+    assert values == pytest.approx(timestamps - 1)
+
+
+def test_bounded_queue(tmp_path):
+    exporter = AnalogStreamExporter(tmp_path / 'stream.h5', compression=None, max_blocks=2)
+    assert exporter.write('AI0', [0, 1], [0, 1])
+    assert exporter.write('AI0', [2, 3], [2, 3])
+    assert not exporter.write('AI0', [4, 5], [4, 5])  # full, the acquisition is not blocked
+    assert exporter.dropped_samples == 2
+    exporter.stop()  # never started, the queued blocks are still saved
+    assert exporter.written_samples == 4
+    with pytest.raises(ValueError):
+        AnalogStreamExporter(tmp_path / 'stream.csv', export_format='csv')
+
+
+def test_follow_full_queue_and_double_stop(tmp_path):
+    path = tmp_path / 'stream'
+    exporter = AnalogStreamExporter(path, export_format='binary', max_blocks=1)
+    assert exporter.write('AI1', [0.], [1.])
+    buffer = AnalogRingBuffer(10)
+    buffer.append(0., 2.)
+    exporter.follow('AI0', buffer, from_start=True)  # the queue is full, following never blocks
+    exporter.stop()
+    exporter.stop()  # already stopped, the files are not written nor closed again
+    exporter.start()
+    exporter.join(1)
+    assert exporter.written_samples == 2
+    assert read_binary(path, 'AI0')[1] == pytest.approx([2.])
+
+    exporter = AnalogStreamExporter(tmp_path / 'stream.h5', period=0.01)
+    exporter.start()
+    exporter.stop()
+    exporter.stop()
+    exporter.follow('AI0', buffer)  # the writer thread has exited
@@ -0,0 +1,44 @@
+import pytest
+from telemetrix import telemetrix
+
+from pymodaq_plugins_arduino.hardware.arduino_telemetrix import Arduino
+
+
+class FakeArduino(Arduino):
+    """ Records the analog commands instead of sending them to a board"""
+    def __init__(self):
+        super().__init__()
+        self.commands = []
+
+    def set_pin_mode_analog_input(self, pin, differential=0, callback=None):
+        self.commands.append(('enable', pin))
+
+    def set_analog_scan_interval(self, interval):
+        self.commands.append(('interval', interval))
+
+    def disable_analog_reporting(self, pin):
+        self.commands.append(('disable', pin))
+
+
+@pytest.fixture
+def board(monkeypatch):
+    monkeypatch.setattr(telemetrix.Telemetrix, '__init__', lambda self, *args, **kwargs: None)
+    return FakeArduino()
+
+
+def test_shared_streaming(board):
+    viewer_0d, viewer_1d = object(), object()
+    board.start_analog_streaming(0, 2, owner=viewer_0d)
+    board.start_analog_streaming(0, 5, owner=viewer_1d)  # already streamed, nothing sent
+    board.start_analog_streaming(1, owner=viewer_1d)
+    assert board.commands == [('enable', 0), ('interval', 2), ('enable', 1), ('interval', 1)]
+    assert board.analog_streaming_pins == {0, 1}
+
+    board.commands.clear()
+    board.stop_analog_streaming(owner=viewer_0d)
+    assert board.commands == []  # still streamed for the other viewer
+    assert board.set_analog_input(0)  # a single acquisition doesn't stop it either
+    assert board.commands == []
+    board.stop_analog_streaming(owner=viewer_1d)
+    assert sorted(board.commands) == [('disable', 0), ('disable', 1)]
+    assert board.analog_streaming_pins == set()
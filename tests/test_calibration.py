@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from pymodaq_plugins_arduino.hardware.calibration import CalibrationLUT, calibration_from_config
+
+
+def test_identity():
+    lut = CalibrationLUT.identity()
+    assert lut.to_pwm(12.4) == 12
+    assert lut.to_pwm(300) == 255
+    assert lut.to_level(100) == 100.
+    np.testing.assert_array_equal(lut.to_pwm(np.array([-5, 0, 127.6])), [0, 0, 128])
+
+
+def test_gamma():
+    lut = CalibrationLUT.from_gamma(2.2)
+    levels = np.arange(256)
+    pwm = lut.to_pwm(levels)
+    assert pwm[0] == 0 and pwm[-1] == 255
+    assert lut.to_pwm(51) == round(255 * 0.2 ** 2.2)
+    assert np.all(np.diff(pwm) >= 0)
+    # inverting then applying again gives back the written PWM values
+    np.testing.assert_array_equal(lut.to_pwm(lut.to_level(pwm)), pwm)
+
+
+def test_table():
+    lut = CalibrationLUT.from_table(pwm=[0, 100, 255], power=[0., 0.8, 1.])
+    assert lut.to_pwm(0) == 0
+    assert lut.to_pwm(255) == 255
+    assert lut.to_pwm(0.4 * 255) == 50  # half of the power of the first segment
+    assert lut.to_level(100) == pytest.approx(0.8 * 255, abs=0.5)
+    with pytest.raises(ValueError):
+        CalibrationLUT.from_table(pwm=[0, 100, 50], power=[0., 0.8, 1.])
+
+
+def test_from_config():
+    assert calibration_from_config({'mode': 'none'}, 'Red').to_pwm(10) == 10
+    assert calibration_from_config({'mode': 'gamma', 'gamma': 2.}, 'Red').to_pwm(51) == 10
+    table = {'mode': 'table', 'Red': {'pwm': [0, 255], 'power': [0, 2.]}}
+    assert calibration_from_config(table, 'Red').to_pwm(200) == 200
+    with pytest.raises(KeyError):
+        calibration_from_config(table, 'Green')
+    with pytest.raises(ValueError):
+        calibration_from_config({'mode': 'other'}, 'Red')
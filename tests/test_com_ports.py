@@ -0,0 +1,54 @@
+import pytest
+
+from pymodaq.utils.parameter import Parameter
+
+from pymodaq_plugins_arduino.hardware import com_ports
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """ Fake port discovery, the module cache is restored after the test"""
+    calls = []
+
+    def fake_list_serial_ports():
+        calls.append(None)
+        return [f'COM{len(calls)}']
+
+    monkeypatch.setattr(com_ports, 'list_serial_ports', fake_list_serial_ports)
+    monkeypatch.setattr(com_ports, '_com_ports', [])
+    monkeypatch.setattr(com_ports, '_discovery_time', None)
+    return calls
+
+
+def test_com_ports_cached(calls):
+
+    assert com_ports.get_com_ports() == ['COM1']
+    assert com_ports.get_com_ports() == ['COM1']
+    assert len(calls) == 1
+    assert com_ports.get_com_ports(refresh=True) == ['COM2']
+    assert com_ports.get_com_ports(ttl=0.) == ['COM3']
+    assert len(calls) == 3
+
+
+def test_update_com_port_limits(calls):
+    param = Parameter.create(name='com_port', type='list', value='COM7', limits=['COM7'])
+    com_ports.update_com_port_limits(param)
+    assert param.opts['limits'] == ['COM1', 'COM7']  # the configured port is kept even if not found
+    assert param.value() == 'COM7'
+    com_ports.update_com_port_limits(param, refresh=True)
+    assert param.opts['limits'] == ['COM2', 'COM7']
+
+
+def test_plugin_params(calls):
+    class Plugin:
+        params = com_ports.PluginParams([{'title': 'Ports:', 'name': 'com_port', 'type': 'list',
+                                          'value': 'COM7', 'limits': ['COM7']},
+                                         {'title': 'Timeout:', 'name': 'timeout', 'type': 'int', 'value': 100}])
+
+    assert len(calls) == 0  # nothing discovered when the class is defined (plugin module import)
+    assert Plugin.params[0]['limits'] == ['COM1', 'COM7']  # the parameters shown before the plugin init
+    assert Plugin().params[0]['limits'] == ['COM1', 'COM7']
+    assert Plugin.params[1]['value'] == 100
+    assert len(calls) == 1
+    settings = Parameter.create(name='settings', type='group', children=Plugin.params)
+    assert settings.child('com_port').opts['limits'] == ['COM1', 'COM7']
@@ -0,0 +1,61 @@
+import pytest
+
+from pymodaq_plugins_arduino.hardware.control_loop import ControlLoop
+
+
+class Plant:
+    """ First order system: the measured value follows gain * output with a time constant tau"""
+    def __init__(self, gain=4., tau=0.01):
+        self.gain = gain
+        self.tau = tau
+        self.output = 0.
+        self.value = 0.
+
+    def write(self, output):
+        self.output = output
+
+    def step(self, dt):
+        self.value += (self.gain * self.output - self.value) * dt / self.tau
+        return self.value
+
+
+def run(loop, plant, n=2000, dt=0.001):
+    for ind in range(n):
+        loop.update(ind * dt, plant.step(dt))
+
+
+def test_converges_to_setpoint():
+    plant = Plant()
+    loop = ControlLoop(plant.write, setpoint=500, kp=0.05, ki=20.)
+    run(loop, plant)
+    assert plant.value == pytest.approx(500, rel=1e-3)
+    assert loop.output == pytest.approx(125, rel=1e-3)
+
+    loop.setpoint = 200  # changed at runtime
+    loop.set_gains(ki=40.)
+    assert loop.kp == 0.05
+    run(loop, plant)
+    assert plant.value == pytest.approx(200, rel=1e-3)
+
+
+def test_output_limits_and_anti_windup():
+    plant = Plant()
+    loop = ControlLoop(plant.write, setpoint=2000, kp=0.05, ki=20., output_limits=(0, 255))
+    run(loop, plant)
+    assert loop.output == 255  # unreachable setpoint: saturated
+    loop.setpoint = 500
+    run(loop, plant, n=200)  # no windup: the integral term was clamped so it recovers quickly
+    assert plant.value == pytest.approx(500, rel=1e-2)
+
+
+def test_stats():
+    plant = Plant()
+    loop = ControlLoop(plant.write, setpoint=500, kp=0.05, ki=20., stats_size=100)
+    run(loop, plant, n=500)
+    stats = loop.get_stats()
+    assert stats['iterations'] == 500
+    assert stats['rate'] == pytest.approx(1000)
+    assert stats['period_max'] == pytest.approx(0.001)
+    assert 0 < stats['latency_mean'] <= stats['latency_max']
+    loop.reset()
+    assert loop.get_stats()['iterations'] == 0
@@ -0,0 +1,60 @@
+import pytest
+
+from pymodaq_plugins_arduino.hardware.controller_registry import ControllerRegistry
+
+
+class FakeBoard:
+    instances = 0
+
+    def __init__(self, com_port: str):
+        FakeBoard.instances += 1
+        self.com_port = com_port
+        self.is_shutdown = False
+
+    def shutdown(self):
+        self.is_shutdown = True
+
+
+class FakeLCDBoard(FakeBoard):
+    pass
+
+
+def test_shared_controller():
+    FakeBoard.instances = 0
+    registry = ControllerRegistry()
+    board = registry.acquire('COM1', FakeBoard)
+    assert registry.acquire('COM1', FakeBoard) is board
+    assert registry.acquire('COM2', FakeBoard) is not board
+    assert FakeBoard.instances == 2
+    assert registry.count('COM1') == 2
+
+    assert not registry.release(board)
+    assert not board.is_shutdown
+    assert registry.release(board)
+    assert board.is_shutdown
+    assert registry.count('COM1') == 0
+
+    assert registry.acquire('COM1', FakeBoard) is not board
+
+
+def test_controller_class_mismatch():
+    registry = ControllerRegistry()
+    board = registry.acquire('COM1', FakeLCDBoard)
+    assert registry.acquire('COM1', FakeBoard) is board  # a subclass instance can be shared
+    registry.release(board)
+    registry.release(board)
+
+    registry.acquire('COM1', FakeBoard)  # the order matters: the most derived class has to be opened first
+    with pytest.raises(TypeError, match='initialize the plugin using FakeLCDBoard first'):
+        registry.acquire('COM1', FakeLCDBoard)
+    assert registry.count('COM1') == 1
+
+
+def test_release_unknown_controller():
+    registry = ControllerRegistry()
+    board = registry.acquire('COM1', FakeBoard)
+    other = FakeBoard('COM1')
+    assert not registry.release(other)
+    assert not other.is_shutdown
+    assert registry.count('COM1') == 1
+    assert registry.release(board)
@@ -0,0 +1,61 @@
+from telemetrix import telemetrix
+
+from pymodaq_plugins_arduino.daq_move_plugins.daq_move_LED import DAQ_Move_LED
+from pymodaq_plugins_arduino.daq_move_plugins.daq_move_LEDwithLCD import DAQ_Move_LEDwithLCD
+from pymodaq_plugins_arduino.hardware.arduino_telemetrix import Arduino
+from pymodaq_plugins_arduino.hardware.arduino_telemetrix_lcd import ArduinoLCD
+from pymodaq_plugins_arduino.hardware.calibration import CalibrationLUT
+from pymodaq_plugins_arduino.hardware.led_lcd import LED_LCD, lcd_string
+
+
+class FakeController:
+    def __init__(self):
+        self.messages = []
+        self.pin_values_output = {}
+
+    def write_pins(self, values):
+        self.messages.append(dict(values))
+        self.pin_values_output.update(values)
+
+    def get_output_pin_value(self, pin):
+        return self.pin_values_output.get(pin, 0)
+
+
+def test_move_axes_abs():
+    plugin = DAQ_Move_LED()
+    plugin.controller = FakeController()
+    red, green, blue = (plugin.axis_names[axis] for axis in ('Red', 'Green', 'Blue'))
+    plugin.calibrations[green] = CalibrationLUT.from_gamma(2.)
+    done = []
+    plugin.move_done_signal.connect(done.append)
+
+    plugin.move_axes_abs({'Red': 255, 'Green': 128, 'Blue': 0})
+    assert plugin.controller.messages == [{red: 255, green: 64, blue: 0}]  # a single calibrated message
+    assert done[-1].value() == 255  # the value of the current axis
+    assert plugin.target_value.value() == 255
+
+
+class FakeLED_LCD(LED_LCD):
+    """ Records the displayed lines instead of writing to a board"""
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def _send_commands(self, commands):
+        pass
+
+    def publish_lines(self, lines):
+        self.lines.append(lines)
+
+
+def test_lcd_displays_levels(monkeypatch):
+    monkeypatch.setattr(telemetrix.Telemetrix, '__init__', lambda self, *args, **kwargs: None)
+    monkeypatch.setattr(ArduinoLCD, '__init__', Arduino.__init__)  # no i2c initialization
+    plugin = DAQ_Move_LEDwithLCD()
+    plugin.controller = FakeLED_LCD()
+    red, green, blue = (plugin.axis_names[axis] for axis in ('Red', 'Green', 'Blue'))
+    plugin.calibrations[green] = CalibrationLUT.from_gamma(2.)
+
+    plugin.move_axes_abs({'Red': 255, 'Green': 128, 'Blue': 0})
+    assert plugin.controller.pin_values_output[green] == 64
+    assert plugin.controller.lines[-1][1] == lcd_string(255, 128, 0)  # the levels, not the PWM values
@@ -0,0 +1,69 @@
+from concurrent.futures import Future
+
+import pytest
+
+pytest.importorskip('pymodaq_utils')  # the plugin uses the PyMoDAQ 5 packages
+
+from pymodaq_plugins_arduino.daq_move_plugins.daq_move_StepperMotor import DAQ_Move_StepperMotor
+
+
+class FakeController:
+    def __init__(self):
+        self.targets = []
+
+    def start_stepper_move(self, position, max_speed=200, acceleration=400, motor=None):
+        assert isinstance(position, float)
+        self.targets.append((motor, position))
+        move = Future()
+        move.set_result(True)
+        return move
+
+    def start_coordinated_move(self, positions, max_speed=200, acceleration=400):
+        self.targets.append(dict(positions))
+        move = Future()
+        move.set_result(True)
+        return move
+
+
+@pytest.fixture
+def stepper():
+    plugin = DAQ_Move_StepperMotor()
+    plugin.controller = FakeController()
+    plugin._motors = {plugin.axis_name: 0}
+    return plugin
+
+
+def test_move_abs(stepper):  # the plugin is a float actuator, DAQ_Move gives it floats
+    stepper.move_abs(120.)
+    assert stepper.controller.targets == [(0, 120.)]
+
+    stepper.settings.child('scaling', 'use_scaling').setValue(True)
+    stepper.settings.child('scaling', 'scaling').setValue(2.)
+    stepper.move_abs(120.)
+    assert stepper.controller.targets[-1] == (0, 60.)
+
+
+def test_move_rel(stepper):
+    stepper.current_value = 100.
+    stepper.move_rel(20.)
+    assert stepper.controller.targets == [(0, 120.)]
+
+    stepper.settings.child('scaling', 'use_scaling').setValue(True)
+    stepper.settings.child('scaling', 'scaling').setValue(2.)
+    stepper.settings.child('scaling', 'offset').setValue(10.)
+    stepper.move_rel(20.)  # target 120 in scaled units
+    assert stepper.controller.targets[-1] == (0, 70.)
+
+
+def test_move_bounds(stepper):
+    stepper.settings.child('bounds', 'is_bounds').setValue(True)
+    stepper.settings.child('bounds', 'max_bound').setValue(100.)
+    stepper.move_abs(120.)  # coerced by check_bound into a DataActuator
+    assert stepper.controller.targets == [(0, 100.)]
+
+
+def test_move_axes_abs(stepper):
+    stepper.move_axes_abs({stepper.axis_name: 50})  # custom command run in the plugin thread
+    assert stepper.controller.targets == [{0: 50}]
+    assert stepper.target_value == 50
+    assert stepper.user_condition_to_reach_target()
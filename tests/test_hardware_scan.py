@@ -0,0 +1,123 @@
+from concurrent.futures import Future, TimeoutError
+from threading import Timer
+from time import time
+
+import numpy as np
+import pytest
+
+from pymodaq_plugins_arduino.hardware.analog_buffer import AnalogRingBuffer
+from pymodaq_plugins_arduino.scanners.hardware_scan import HardwareScan, grid_trajectory, linear_trajectory
+
+
+class FakeBoard:
+    """ Reports the sum of the PWM outputs and stepper positions on each analog pin shortly after every move"""
+    def __init__(self, reports=1, complete_moves=True):
+        self.reports = reports
+        self.complete_moves = complete_moves
+        self.stopped = []
+        self.outputs = {}
+        self.analog_streaming_pins = set()
+        self.analog_pin_values_input = {0: 0, 1: 0}
+        self.buffers = {0: AnalogRingBuffer(100), 1: AnalogRingBuffer(100)}
+        self.pwm_writes = 0
+
+    def get_analog_buffer(self, pin):
+        return self.buffers[pin]
+
+    def start_analog_streaming(self, pin, scan_interval=1):
+        self.analog_streaming_pins.add(pin)
+
+    def stop_analog_streaming(self, pin=None):
+        self.analog_streaming_pins.discard(pin)
+
+    def report(self):
+        Timer(0.001, self._report).start()
+
+    def _report(self):
+        for pin in list(self.analog_streaming_pins):
+            value = sum(self.outputs.values()) + pin
+            self.analog_pin_values_input[pin] = value
+            for _ in range(self.reports):
+                self.buffers[pin].append(time(), value)
+
+    def write_pins(self, values):
+        self.pwm_writes += 1
+        self.outputs.update(values)
+        self.report()
+
+    def servo_move_degree(self, pin, value):
+        self.outputs[pin] = value
+
+    def start_coordinated_move(self, positions, max_speed=200, acceleration=400):
+        self.outputs.update({f'motor{motor}': position for motor, position in positions.items()})
+        self.report()
+        move = Future()
+        if self.complete_moves:
+            move.set_result(True)
+        return move
+
+    def estimate_stepper_completion(self, motor):
+        return time() + 0.05
+
+    def stop_stepper(self, motor):
+        self.stopped.append(motor)
+
+
+def test_trajectories():
+    assert linear_trajectory(0, 255, 6)[:, 0] == pytest.approx([0, 51, 102, 153, 204, 255])
+    grid = grid_trajectory([0, 1], [10, 20, 30])
+    assert grid.shape == (6, 2)
+    assert grid[:, 1] == pytest.approx([10, 20, 30, 10, 20, 30])
+    snake = grid_trajectory([0, 1], [10, 20, 30], snake=True)
+    assert snake[:, 0] == pytest.approx([0, 0, 0, 1, 1, 1])
+    assert snake[:, 1] == pytest.approx([10, 20, 30, 30, 20, 10])
+    with pytest.raises(ValueError):
+        linear_trajectory(0, 1, 0)
+
+
+def test_pwm_scan():
+    board = FakeBoard()
+    scan = HardwareScan(board, [('pwm', 9), ('pwm', 10)], [0, 1])
+    trajectory = np.stack((np.arange(10), 2 * np.arange(10)), axis=1)
+    timestamps, values = scan.run(trajectory)
+    assert board.pwm_writes == 10  # one message per point for both pins
+    assert values[:, 0] == pytest.approx(3 * np.arange(10))
+    assert values[:, 1] == pytest.approx(3 * np.arange(10) + 1)
+    assert np.all(np.diff(timestamps) >= 0)
+    assert scan.missed_points == 0
+    assert board.analog_streaming_pins == set()  # streaming started by the scan is stopped
+
+
+def test_averaging_and_steppers():
+    board = FakeBoard(reports=3)
+    scan = HardwareScan(board, [('servo', 5), ('stepper', 0)], [0], averaging=3)
+    timestamps, values = scan.run(grid_trajectory([0, 90], [100, 200]))
+    assert values[:, 0] == pytest.approx([100, 200, 190, 290])
+
+
+def test_missed_points():
+    board = FakeBoard()
+    scan = HardwareScan(board, [('servo', 5)], [0], timeout=0.01)  # no report after a servo move in the fake
+    board.analog_pin_values_input[0] = 12
+    timestamps, values = scan.run(linear_trajectory(0, 180, 3))
+    assert scan.missed_points == 3
+    assert np.all(np.isnan(values))  # the last known value is not returned as a fresh one
+    assert np.all(np.isnan(timestamps))
+
+
+def test_stepper_move_timeout():
+    board = FakeBoard(complete_moves=False)  # the completion report is lost
+    scan = HardwareScan(board, [('stepper', 0), ('stepper', 1)], [0], timeout=0.05)
+    with pytest.raises(TimeoutError):
+        scan.run(np.array([[100, 200]]))
+    assert board.stopped == [0, 1]
+    assert board.analog_streaming_pins == set()
+
+
+def test_background_scan():
+    board = FakeBoard()
+    scan = HardwareScan(board, [('pwm', 9)], [0])
+    timestamps, values = scan.start(linear_trajectory(0, 255, 256)).result(timeout=5)
+    assert values[:, 0] == pytest.approx(np.arange(256))
+    with pytest.raises(ValueError):
+        scan.run(np.zeros((3, 2)))
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+
+# recorded budget (in µs) of the self import time of the plugin modules, dependencies excluded
+IMPORT_TIME_BUDGET = 150000
+
+HEAVY_MODULES = ('telemetrix', 'pyvisa', 'serial.tools.list_ports')  # no port discovery either
+
+PLUGIN_PACKAGES = ['pymodaq_plugins_arduino.daq_move_plugins',
+                   'pymodaq_plugins_arduino.daq_move_plugins.daq_move_LED',
+                   'pymodaq_plugins_arduino.daq_move_plugins.daq_move_Servo',
+                   'pymodaq_plugins_arduino.daq_viewer_plugins.plugins_0D',
+                   'pymodaq_plugins_arduino.daq_viewer_plugins.plugins_0D.daq_0Dviewer_Analog',
+                   'pymodaq_plugins_arduino.daq_viewer_plugins.plugins_1D',
+                   'pymodaq_plugins_arduino.daq_viewer_plugins.plugins_1D.daq_1Dviewer_AnalogWaveform',
+                   'pymodaq_plugins_arduino.extensions.color_synthesizer']
+
+
+def import_plugins():
+    code = (f"import sys; import {', '.join(PLUGIN_PACKAGES)}; "
+            f"print(','.join(mod for mod in {HEAVY_MODULES} if mod in sys.modules))")
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    return subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          capture_output=True, text=True, env=env, check=True)
+
+
+def get_self_import_time(importtime_output: str, package: str = 'pymodaq_plugins_arduino') -> int:
+    """ Sum the self import times (µs) of the modules of package from the output of -X importtime"""
+    total = 0
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_time, _, module = line[len('import time:'):].split('|')
+        if module.strip().startswith(package):
+            total += int(self_time)
+    return total
+
+
+def test_plugin_import_cost():
+    result = import_plugins()
+    assert result.stdout.strip() == ''  # no hardware library imported for plugin discovery
+    assert get_self_import_time(result.stderr) < IMPORT_TIME_BUDGET
@@ -0,0 +1,102 @@
+from pymodaq_plugins_arduino.hardware.lcd_i2c import const as Const
+from pymodaq_plugins_arduino.hardware.lcd_i2c.lcd_i2c import LCD, I2C_MAX_WRITE_BYTES
+
+
+class I2CRecorder:
+    """ Record the i2c writes instead of sending them to an Arduino board"""
+    def __init__(self):
+        self.writes = []
+
+    def writeto(self, addr, bytes_to_write: bytes):
+        self.writes.append(bytes(bytes_to_write))
+
+    @property
+    def data(self):
+        return b''.join(self.writes)
+
+
+def expected_bytes(value: int, mode: int = 0):
+    """ the byte by byte sequence of the original driver"""
+    data = []
+    for nibble in (value & 0xF0, (value << 4) & 0xF0):
+        nibble |= mode
+        data.extend([nibble | Const.LCD_BACKLIGHT, nibble | Const.EN | Const.LCD_BACKLIGHT,
+                     (nibble & ~Const.EN) | Const.LCD_BACKLIGHT])
+    return data
+
+
+def test_print_is_batched():
+    i2c = I2CRecorder()
+    lcd = LCD(0x27, 16, 2, i2c=i2c)
+    text = 'RED  GREEN  BLUE'
+    lcd.print(text)
+
+    assert len(i2c.writes) == len(text) * 6 // I2C_MAX_WRITE_BYTES
+    assert all(len(write) <= I2C_MAX_WRITE_BYTES for write in i2c.writes)
+    expected = []
+    for char in text:
+        expected.extend(expected_bytes(ord(char), Const.RS))
+    assert i2c.data == bytes(expected)
+    assert lcd.cursor_position == (16, 0)
+
+
+def test_command_is_batched():
+    i2c = I2CRecorder()
+    lcd = LCD(0x27, 16, 2, i2c=i2c)
+    lcd.set_cursor(3, 1)
+    assert len(i2c.writes) == 1
+    assert i2c.data == bytes(expected_bytes(Const.LCD_SETDDRAMADDR | (3 + 0x40)))
+
+
+def test_render_only_sends_changes():
+    i2c = I2CRecorder()
+    lcd = LCD(0x27, 16, 2, i2c=i2c)
+    lcd.render(['RED  GREEN  BLUE', '000   000    000'])
+    assert lcd.framebuffer == ['RED  GREEN  BLUE', '000   000    000']
+    assert lcd.cursor_position == (16, 1)
+
+    i2c.writes = []
+    lcd.render(['RED  GREEN  BLUE', '000   128    000'])
+    expected = expected_bytes(Const.LCD_SETDDRAMADDR | (6 + 0x40))
+    for char in '128':
+        expected.extend(expected_bytes(ord(char), Const.RS))
+    assert i2c.data == bytes(expected)
+    assert lcd.framebuffer[1] == '000   128    000'
+    assert lcd.cursor_position == (9, 1)
+
+    i2c.writes = []
+    lcd.render(['RED  GREEN  BLUE', '000   128    000'])
+    assert i2c.writes == []
+
+
+def test_render_merges_close_runs():
+    i2c = I2CRecorder()
+    lcd = LCD(0x27, 16, 2, i2c=i2c)
+    lcd.render(['a b'])
+    # the cursor is at home, 'a', ' ' and 'b' are sent without moving the cursor
+    assert len(i2c.data) == 3 * 6
+    assert lcd.framebuffer == ['a b'.ljust(16), ' ' * 16]
+
+
+def test_refresh_worker_skips_intermediate_frames():
+    import time
+    from pymodaq_plugins_arduino.hardware.arduino_telemetrix_lcd import LCDRefreshWorker
+
+    class SlowLCD:
+        def __init__(self):
+            self.frames = []
+
+        def render(self, lines):
+            time.sleep(0.01)
+            self.frames.append(lines)
+
+    lcd = SlowLCD()
+    worker = LCDRefreshWorker(lcd, max_rate=50)
+    worker.start()
+    for ind in range(100):
+        worker.publish([f'{ind:03d}'])
+    time.sleep(0.2)
+    worker.stop()
+    assert not worker.is_alive()
+    assert len(lcd.frames) < 10
+    assert lcd.frames[-1] == ['099']
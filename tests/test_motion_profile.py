@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from pymodaq_plugins_arduino.hardware.motion_profile import TrapezoidalProfile
+
+
+def test_trapezoidal():
+    profile = TrapezoidalProfile(0, 1000, max_speed=200, acceleration=400, start_time=10.)
+    # 0.5 s to reach 200 steps/s over 50 steps, 900 steps at 200 steps/s, 0.5 s to stop
+    assert profile.peak_speed == 200
+    assert profile.duration == pytest.approx(5.5)
+    assert profile.estimated_completion == pytest.approx(15.5)
+    assert profile.position(0.5) == pytest.approx(50)
+    assert profile.position(5.0) == pytest.approx(950)
+    assert profile.position(2.75) == pytest.approx(500)
+    assert profile.position(10) == pytest.approx(1000)
+    assert profile.position_at(10. + 0.5) == pytest.approx(50)
+    assert profile.remaining_time(15.) == pytest.approx(0.5)
+    assert profile.remaining_time(20.) == 0.
+
+
+def test_triangular_and_backward():
+    profile = TrapezoidalProfile(100, 0, max_speed=200, acceleration=400)
+    # too short to reach max_speed: 0.5 s accelerating over 50 steps, 0.5 s decelerating
+    assert profile.peak_speed == pytest.approx(200)
+    assert profile.duration == pytest.approx(1.)
+    profile = TrapezoidalProfile(100, 75, max_speed=200, acceleration=400)
+    assert profile.duration == pytest.approx(0.5)
+    assert profile.position(0.25) == pytest.approx(87.5)
+
+
+def test_vectorized():
+    profile = TrapezoidalProfile(0, 1000, max_speed=200, acceleration=400)
+    times = np.linspace(-1, profile.duration + 1, 1001)
+    positions = profile.position(times)
+    assert positions.shape == times.shape
+    assert positions[0] == 0 and positions[-1] == pytest.approx(1000)
+    assert np.all(np.diff(positions) >= 0)
+    assert np.max(np.diff(positions) / np.diff(times)) == pytest.approx(200)
+
+
+def test_no_move():
+    profile = TrapezoidalProfile(10, 10, max_speed=200, acceleration=400)
+    assert profile.duration == 0
+    assert profile.position(1.) == 10
+    with pytest.raises(ValueError):
+        TrapezoidalProfile(0, 10, max_speed=0, acceleration=400)
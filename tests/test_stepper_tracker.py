@@ -0,0 +1,61 @@
+import time
+from threading import Thread
+
+from pymodaq_plugins_arduino.hardware.stepper_tracker import StepperPositionTracker
+
+
+class FakeBoard:
+    """ Answer the position requests from another thread, as the Telemetrix reporting thread"""
+    def __init__(self):
+        self.position = 0
+        self.requests = 0
+
+    def stepper_get_current_position(self, motor_id, current_position_callback):
+        self.requests += 1
+        Thread(target=current_position_callback,
+               args=([17, motor_id, self.position, time.time()],)).start()
+
+
+def test_read():
+    board = FakeBoard()
+    tracker = StepperPositionTracker(board, 0)
+    board.position = 42
+    assert tracker.position == 0
+    assert tracker.read(timeout=1.) == 42
+    assert tracker.position == 42
+    assert tracker.count == 1
+
+
+def wait_until(condition, timeout=5.):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline
+        time.sleep(0.005)
+
+
+def test_tracking_is_rate_limited():
+    rate = 50.
+    board = FakeBoard()
+    tracker = StepperPositionTracker(board, 0, rate=rate)
+    tracker.start()
+    try:
+        time.sleep(0.1)
+        assert board.requests == 0  # idle motor, no traffic
+
+        start = time.perf_counter()
+        board.position = 10
+        tracker.start_tracking()
+        wait_until(lambda: tracker.position == 10)
+        time.sleep(0.2)
+        requests = board.requests
+        assert 1 <= requests <= (time.perf_counter() - start) * rate + 1  # whatever the load of the machine
+
+        board.position = 20
+        tracker.stop_tracking()  # the final position is requested
+        wait_until(lambda: tracker.position == 20)
+        requests = board.requests
+        time.sleep(0.1)
+        assert board.requests <= requests + 1  # at most a request already started when tracking stopped
+    finally:
+        tracker.stop()
+    assert not tracker.is_alive()